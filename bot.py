@@ -1,27 +1,28 @@
 """VicBot Discord bot implementation."""
 from __future__ import annotations
 
-# --- .env 載入（緊接在 future import 之後）---
-from dotenv import load_dotenv
-import os
-load_dotenv()
-print("DISCORD_TOKEN loaded?", bool(os.getenv("DISCORD_TOKEN")))
-# ---------------------------------------------
-
 import asyncio
+import heapq
 import logging
-from datetime import datetime, timedelta, time as dtime
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from typing import List, Optional, Dict, Tuple
+from typing import Awaitable, Callable, List, Optional, Dict, Set, Tuple, Union
 
+import aiohttp
 import discord
-from discord.ext import commands, tasks
-from discord.utils import utcnow
+from discord.ext import commands
+from dotenv import load_dotenv
 
 from src import database
 from src.config import BotConfig, load_config
-from src.services import cases, clients, market, monitoring, viewings, price_query
-from src.utils.formatting import parse_datetime, parse_float_range, parse_range
+from src.services import cases, clients, data_downloader, market, monitoring, viewings, price_query
+from src.utils.async_cache import cached
+from src.utils.formatting import parse_datetime, parse_float_range, parse_price, parse_range
+from src.utils.ttl_cache import TTLCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,84 +32,310 @@ INTENTS = discord.Intents.default()
 INTENTS.message_content = True
 INTENTS.members = True
 
+# 批次推播（監控條件、看屋提醒）同時進行的上限，避免觸發 Discord 速率限制
+_FANOUT_CONCURRENCY = 8
+
+# market.* 查詢結果的快取秒數
+_LISTINGS_CACHE_TTL = 120
+_MARKET_CACHE_TTL = 300
+
+# fetch_user / fetch_channel 結果的快取秒數；頻道不存在的結果只保留較短時間
+_LOOKUP_CACHE_TTL = 3600
+_MISSING_CHANNEL_TTL = 60
+
+# 未設定 ANNOUNCEMENT_CHANNEL_ID 時，以此名稱辨識公告頻道
+_ANNOUNCE_CHANNEL_NAME = "公告"
+
+# 公告頻道違規計數的保留時間與上限
+_WARNINGS_TTL = 7 * 24 * 3600
+_WARNINGS_MAXSIZE = 100_000
+
+# Discord 日誌批次發送：閒置 0.5 秒或累積超過 1800 字即送出，單則訊息上限 2000 字
+_DISCORD_MESSAGE_LIMIT = 2000
+_LOG_BATCH_CHARS = 1800
+_LOG_FLUSH_IDLE = 0.5
+
+# 房價查詢 Embed 的資料來源與授權聲明（依政府資料開放授權條款須標示）
+_DATA_SOURCE_TEXT = "數據來源：內政部不動產成交案件實價登錄"
+_LICENSE_BLOCK = "\n依政府資料開放授權條款 (OGDL) 第1版公眾釋出\n授權連結：https://data.gov.tw/license"
+_DATA_SOURCE_BLOCK = f"{_DATA_SOURCE_TEXT}\n{_LICENSE_BLOCK}"
+
+# 看屋列表預設查詢範圍
+_ONE_WEEK = timedelta(days=7)
+
+# Discord 單一 Embed 所有文字總長上限
+_EMBED_TOTAL_LIMIT = 6000
+
 
 class VicBot(commands.Bot):
     def __init__(self, *, config: BotConfig):
         super().__init__(command_prefix="!", intents=INTENTS)
         self.config = config
         self.local_tz = ZoneInfo(config.timezone)
-        self._last_moi_sync_week: Optional[int] = None
-        self._last_report_week: Optional[int] = None
+        # 排程 min-heap：(下次執行 epoch 秒, 名稱, fn, 依上次時間計算下次時間)
+        self._schedule: List[Tuple[float, str, Callable[[], Awaitable[None]], Callable[[float], float]]] = []
+        self._schedule_changed = asyncio.Event()
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._running_jobs: set[asyncio.Task] = set()
+        # 待發送到 Discord 的日誌：(channel_id, 已格式化訊息)
+        self._log_queue: asyncio.Queue[Tuple[int, str]] = asyncio.Queue()
+        self._log_flusher_task: Optional[asyncio.Task] = None
+        self._db_init_task: Optional[asyncio.Task] = None
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # 透過 REST 取得的使用者 / 頻道快取：id -> (過期時間, 物件)
+        self._user_cache: Dict[int, Tuple[float, discord.User]] = {}
+        self._channel_cache: Dict[int, Tuple[float, Union[discord.abc.Messageable, discord.NotFound]]] = {}
+        # 各伺服器 名稱 -> 角色 / 文字頻道 ID 索引；首次查詢時建立，角色或頻道異動時作廢
+        self._role_name_idx: Dict[int, Dict[str, int]] = {}
+        self._text_channel_name_idx: Dict[int, Dict[str, int]] = {}
 
         # 公告頻道違規計數與可配置項目
-        self._channel_warnings: Dict[Tuple[int, int], int] = {}  # (guild_id, user_id) -> warnings
+        # (guild_id, user_id) -> warnings；一週未再違規即重新計算，並限制總筆數
+        self._channel_warnings: TTLCache[Tuple[int, int], int] = TTLCache(
+            maxsize=_WARNINGS_MAXSIZE, ttl=_WARNINGS_TTL
+        )
         self.announcement_channel_id: Optional[int] = config.announcement_channel_id
         self.announce_timeout_hours: int = config.announce_timeout_hours
-
-        # 任務錯誤處理
-        self.moi_sync_task.add_exception_type(Exception)
-        self.weekly_report_task.add_exception_type(Exception)
-        self.viewing_reminder_task.add_exception_type(Exception)
+        # 警告私訊範本：禁言時數於啟動時代入，發送時只需填入頻道名稱與次數
+        self._warn_tpl_first = "⚠️ 您於 #{channel} 頻道沒有發言權限。\n\n這是您的第 1 次警告。".format
+        self._warn_tpl_second = (
+            "⚠️ 您於 #{channel} 頻道沒有發言權限。\n\n"
+            f"這是您的第 2 次警告，再違規將被禁言 {self.announce_timeout_hours} 小時。"
+        ).format
+        self._warn_tpl_nth = "⚠️ 您於 #{channel} 頻道沒有發言權限。\n\n這是您的第 {warnings} 次警告。".format
+        self._warn_tpl_muted = (
+            "⚠️ 您已在 #{channel} 頻道違規發言 3 次。\n\n"
+            f"您已被禁言 {self.announce_timeout_hours} 小時，警告次數已重置。"
+        ).format
+        # 未設定公告頻道 ID 時，逐一伺服器收集名為「公告」的文字頻道（on_ready / 加入伺服器 / 首則訊息時）
+        self._announce_channel_ids: Set[int] = {self.announcement_channel_id} if self.announcement_channel_id else set()
+        self._announce_indexed_guilds: Set[int] = set()
 
         # 房價查詢設定
         if config.price_query_enabled:
             price_query.set_cache_ttl(config.price_cache_ttl_hours)
-            logger.info(f"房價查詢功能已啟用 | cache_ttl={config.price_cache_ttl_hours}小時")
+            logger.info("房價查詢功能已啟用 | cache_ttl=%s小時", config.price_cache_ttl_hours)
+
+    async def login(self, token: str) -> None:
+        # 資料庫初始化（磁碟）與 REST 登入（網路）同時進行，setup_hook 再等待建表完成
+        self._db_init_task = asyncio.create_task(database.init_db(self.config.timezone))
+        try:
+            await super().login(token)
+        except BaseException:
+            self._db_init_task.cancel()
+            raise
 
     async def setup_hook(self) -> None:
-        await database.init_db()
-        self.moi_sync_task.start()
-        self.weekly_report_task.start()
-        self.viewing_reminder_task.start()
+        await self._db_init_task
+        # 對外 HTTP（market.*）共用連線池，保留 keep-alive 連線
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=10, keepalive_timeout=60, ttl_dns_cache=300)
+        )
+        # 每週一 09:00 同步監控條件（啟動時若本週時段已過則補跑）、10:00 發送週報、每分鐘檢查看屋提醒；
+        # 補跑依賴 _process_rule_group 每則私訊成功即寫入 rule_sync_log，已推播的使用者不會重收
+        now = time.time()
+        self._add_job("moi_sync", self._do_moi_sync, self._first_weekly(0, 9, catch_up=True), self._weekly(0, 9))
+        self._add_job("weekly_report", self._do_weekly_report, self._first_weekly(0, 10), self._weekly(0, 10))
+        self._add_job("viewing_reminder", self._do_viewing_reminders, now, lambda prev: max(prev + 60, time.time()))
+        self._scheduler_task = asyncio.create_task(self._scheduler())
+        self._log_flusher_task = asyncio.create_task(self._flush_discord_logs())
+
+    async def close(self) -> None:
+        for task in (self._scheduler_task, self._log_flusher_task):
+            if task is not None:
+                task.cancel()
+        for task in list(self._running_jobs):
+            task.cancel()
+        await super().close()
+        if self.http_session is not None:
+            await self.http_session.close()
+        await data_downloader.shutdown()
+        await database.close_db()
 
     async def on_ready(self) -> None:
         logger.info("VicBot 已上線，登入為 %s", self.user)
 
+        if not self.announcement_channel_id:
+            # 重新連線也會觸發 on_ready，整份重建以清掉已離開的伺服器
+            self._announce_channel_ids = set()
+            self._announce_indexed_guilds = set()
+            for guild in self.guilds:
+                self._index_announce_channels(guild)
+
         # 自動檢查並下載房價資料（如果啟用）
         if self.config.price_query_enabled:
             await self._ensure_price_data()
 
-    async def _log_to_discord(self, message: str, level: str = "info") -> None:
+    async def _resolve_user(self, user_id: int, guild_id: Optional[int] = None) -> discord.abc.User:
+        """優先使用 gateway 快取（含 members intent 的成員快取），找不到時才呼叫 REST 並暫存結果。"""
+        user = self.get_user(user_id)
+        if user:
+            return user
+        if guild_id is not None:
+            guild = self.get_guild(guild_id)
+            member = guild.get_member(user_id) if guild else None
+            if member:
+                return member
+        now = time.monotonic()
+        entry = self._user_cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+        user = await self.fetch_user(user_id)
+        self._user_cache[user_id] = (now + _LOOKUP_CACHE_TTL, user)
+        return user
+
+    async def _resolve_channel(self, channel_id: int) -> discord.abc.Messageable:
+        """同 _resolve_user，找不到頻道時由 fetch_channel 拋出 discord.NotFound。"""
+        channel = self.get_channel(channel_id)
+        if channel:
+            return channel
+        now = time.monotonic()
+        entry = self._channel_cache.get(channel_id)
+        if entry and entry[0] > now:
+            if isinstance(entry[1], discord.NotFound):
+                raise entry[1].with_traceback(None)
+            return entry[1]
+        try:
+            channel = await self.fetch_channel(channel_id)
+        except discord.NotFound as exc:
+            # 設定錯誤的頻道 ID 短時間內不再重複呼叫 REST
+            self._channel_cache[channel_id] = (now + _MISSING_CHANNEL_TTL, exc)
+            raise
+        self._channel_cache[channel_id] = (now + _LOOKUP_CACHE_TTL, channel)
+        return channel
+
+    def _find_role(self, guild: discord.Guild, name: str) -> Optional[discord.Role]:
+        index = self._role_name_idx.get(guild.id)
+        if index is None:
+            index = {}
+            for role in guild.roles:
+                index.setdefault(role.name, role.id)  # 同名時與 discord.utils.get 一樣取第一個
+            self._role_name_idx[guild.id] = index
+        role_id = index.get(name)
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def _find_text_channel(self, guild: discord.Guild, name: str) -> Optional[discord.TextChannel]:
+        index = self._text_channel_name_idx.get(guild.id)
+        if index is None:
+            index = {}
+            for channel in guild.text_channels:
+                index.setdefault(channel.name, channel.id)
+            self._text_channel_name_idx[guild.id] = index
+        channel_id = index.get(name)
+        return guild.get_channel(channel_id) if channel_id is not None else None
+
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        self._role_name_idx.pop(role.guild.id, None)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        self._role_name_idx.pop(role.guild.id, None)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        self._role_name_idx.pop(after.guild.id, None)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        self._text_channel_name_idx.pop(channel.guild.id, None)
+        self._track_announce_channel(channel)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self._text_channel_name_idx.pop(channel.guild.id, None)
+        if not self.announcement_channel_id:
+            self._announce_channel_ids.discard(channel.id)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        self._text_channel_name_idx.pop(after.guild.id, None)
+        self._track_announce_channel(after)
+
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        self._index_announce_channels(guild)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self._role_name_idx.pop(guild.id, None)
+        self._text_channel_name_idx.pop(guild.id, None)
+        if not self.announcement_channel_id:
+            self._announce_channel_ids.difference_update(channel.id for channel in guild.channels)
+            self._announce_indexed_guilds.discard(guild.id)
+
+    def _index_announce_channels(self, guild: discord.Guild) -> None:
+        """名稱備援模式下，將該伺服器所有「公告」文字頻道加入公告頻道 ID 集合。"""
+        if self.announcement_channel_id:
+            return
+        self._announce_channel_ids.update(
+            channel.id for channel in guild.text_channels if channel.name == _ANNOUNCE_CHANNEL_NAME
+        )
+        self._announce_indexed_guilds.add(guild.id)
+
+    def _track_announce_channel(self, channel: discord.abc.GuildChannel) -> None:
+        """名稱備援模式下，頻道新增或改名時同步公告頻道 ID 集合。"""
+        if self.announcement_channel_id:
+            return
+        if isinstance(channel, discord.TextChannel) and channel.name == _ANNOUNCE_CHANNEL_NAME:
+            self._announce_channel_ids.add(channel.id)
+        else:
+            self._announce_channel_ids.discard(channel.id)
+
+    def _dual_log(self, level: str, message: str) -> None:
+        """同時寫入終端機日誌與 Discord 日誌頻道。"""
+        getattr(logger, level)(message)
+        self._log_to_discord(message, level=level)
+
+    def _log_to_discord(self, message: str, level: str = "info") -> None:
         """
-        將日誌訊息發送到 Discord 頻道。
+        將日誌訊息排入佇列，由背景任務合併後發送到 Discord 頻道。
 
         Args:
             message: 日誌訊息內容
             level: 日誌等級 ("info", "warning", "error")
         """
-        try:
-            # 根據等級決定發送到哪個頻道
-            if level in ("error", "critical"):
-                channel_id = self.config.error_log_channel_id
-                emoji = "🚨"
-            else:
-                channel_id = self.config.system_log_channel_id
-                emoji = "ℹ️" if level == "info" else "⚠️"
-
-            if not channel_id:
-                return  # 未設定頻道 ID，不發送
+        # 根據等級決定發送到哪個頻道；未設定頻道 ID 時不做任何格式化直接返回
+        is_error = level in ("error", "critical")
+        channel_id = self.config.error_log_channel_id if is_error else self.config.system_log_channel_id
+        if not channel_id:
+            return
 
-            channel = self.get_channel(channel_id)
-            if not channel:
-                try:
-                    channel = await self.fetch_channel(channel_id)
-                except discord.NotFound:
-                    logger.warning("日誌頻道不存在 | channel_id=%s", channel_id)
-                    return
-                except Exception as exc:
-                    logger.error("取得日誌頻道失敗 | channel_id=%s | error=%s", channel_id, exc)
-                    return
+        # 格式化訊息
+        emoji = "🚨" if is_error else ("ℹ️" if level == "info" else "⚠️")
+        # isoformat 由 C 實作，比 strftime 快；去掉時區後綴即為 YYYY-MM-DD HH:MM:SS
+        timestamp = datetime.now(self.local_tz).isoformat(sep=" ", timespec="seconds")[:19]
+        formatted_msg = f"{emoji} `[{timestamp}]` {message}"
 
-            # 格式化訊息
-            timestamp = datetime.now(self.local_tz).strftime("%Y-%m-%d %H:%M:%S")
-            formatted_msg = f"{emoji} `[{timestamp}]` {message}"
+        # 如果訊息太長，截斷
+        if len(formatted_msg) > _DISCORD_MESSAGE_LIMIT:
+            formatted_msg = formatted_msg[: _DISCORD_MESSAGE_LIMIT - 3] + "..."
 
-            # 如果訊息太長，分段發送
-            if len(formatted_msg) > 2000:
-                formatted_msg = formatted_msg[:1997] + "..."
+        self._log_queue.put_nowait((channel_id, formatted_msg))
 
-            await channel.send(formatted_msg)
+    async def _flush_discord_logs(self) -> None:
+        """收到日誌後持續收集到閒置或累積過長，再依頻道合併成少數幾則訊息送出。"""
+        await self.wait_until_ready()
+        while not self.is_closed():
+            pending: Dict[int, List[str]] = defaultdict(list)
+            channel_id, line = await self._log_queue.get()
+            pending[channel_id].append(line)
+            size = len(line)
+            while size < _LOG_BATCH_CHARS:
+                try:
+                    channel_id, line = await asyncio.wait_for(self._log_queue.get(), timeout=_LOG_FLUSH_IDLE)
+                except asyncio.TimeoutError:
+                    break
+                pending[channel_id].append(line)
+                size += len(line) + 1
+            for channel_id, lines in pending.items():
+                await self._send_log_lines(channel_id, lines)
+
+    async def _send_log_lines(self, channel_id: int, lines: List[str]) -> None:
+        try:
+            channel = await self._resolve_channel(channel_id)
+        except discord.NotFound:
+            logger.warning("日誌頻道不存在 | channel_id=%s", channel_id)
+            return
+        except Exception as exc:
+            logger.error("取得日誌頻道失敗 | channel_id=%s | error=%s", channel_id, exc)
+            return
 
+        try:
+            for content in _pack_lines(lines, _DISCORD_MESSAGE_LIMIT):
+                await channel.send(content)
         except discord.Forbidden:
             logger.warning("無權限發送日誌到 Discord 頻道 | channel_id=%s", channel_id)
         except Exception as exc:
@@ -125,30 +352,24 @@ class VicBot(commands.Bot):
         try:
             logger.info("🔄 檢查房價資料更新...")
 
-            from src.services import data_downloader
-
             # 檢查快取資訊
             cache_info = data_downloader.get_taichung_cache_info()
 
             if cache_info:
                 if cache_info["is_valid"]:
                     logger.info(
-                        f"✅ 房價資料快取有效 | "
-                        f"last_modified={cache_info['last_modified']} | "
-                        f"age={cache_info['age_days']}天 | "
-                        f"expires_in={cache_info['expires_in_days']}天"
+                        "✅ 房價資料快取有效 | last_modified=%s | age=%s天 | expires_in=%s天",
+                        cache_info["last_modified"],
+                        cache_info["age_days"],
+                        cache_info["expires_in_days"],
                     )
-                    await self._log_to_discord(
+                    self._log_to_discord(
                         f"房價資料快取有效（{cache_info['age_days']}天前更新，{cache_info['expires_in_days']}天後過期）",
                         level="info"
                     )
                 else:
-                    logger.info(
-                        f"⚠️ 房價資料快取已過期 | "
-                        f"age={cache_info['age_days']}天 | "
-                        f"開始下載最新資料..."
-                    )
-                    await self._log_to_discord(
+                    logger.info("⚠️ 房價資料快取已過期 | age=%s天 | 開始下載最新資料...", cache_info["age_days"])
+                    self._log_to_discord(
                         f"房價資料快取已過期（{cache_info['age_days']}天），正在下載最新資料...",
                         level="warning"
                     )
@@ -157,23 +378,21 @@ class VicBot(commands.Bot):
             result_path = await data_downloader.ensure_taichung_data()
 
             if result_path:
-                logger.info(f"✅ 房價資料已就緒 | path={result_path}")
-                await self._log_to_discord(
+                logger.info("✅ 房價資料已就緒 | path=%s", result_path)
+                self._log_to_discord(
                     f"✅ 房價資料已就緒",
                     level="info"
                 )
             else:
                 logger.error("❌ 房價資料下載失敗且無本地快取")
-                await self._log_to_discord(
+                self._log_to_discord(
                     "❌ 房價資料下載失敗且無本地快取，房價查詢功能可能無法使用",
                     level="error"
                 )
 
-        except ImportError:
-            logger.warning("⚠️ data_downloader 模組不可用，跳過自動下載")
         except Exception as exc:
-            logger.error(f"❌ 房價資料檢查失敗 | error={exc}", exc_info=True)
-            await self._log_to_discord(
+            logger.error("❌ 房價資料檢查失敗 | error=%s", exc, exc_info=True)
+            self._log_to_discord(
                 f"❌ 房價資料檢查失敗：{exc}",
                 level="error"
             )
@@ -183,18 +402,15 @@ class VicBot(commands.Bot):
         if message.author.bot:
             return
 
-        # 是否在公告頻道（ID 優先，名稱備援）
-        in_announce = False
-        announcement_channel = None
-        if message.guild and isinstance(message.channel, discord.TextChannel):
-            if self.announcement_channel_id:
-                in_announce = (message.channel.id == self.announcement_channel_id)
-                if in_announce:
-                    announcement_channel = message.channel
-            else:
-                in_announce = (message.channel.name == "公告")
-                if in_announce:
-                    announcement_channel = message.channel
+        # 是否在公告頻道（ID 優先，名稱備援已解析為頻道 ID；on_ready 前收到的訊息在此補建該伺服器）
+        if (
+            message.guild is not None
+            and not self.announcement_channel_id
+            and message.guild.id not in self._announce_indexed_guilds
+        ):
+            self._index_announce_channels(message.guild)
+        in_announce = message.guild is not None and message.channel.id in self._announce_channel_ids
+        announcement_channel = message.channel if in_announce else None
 
         # 非管理員在公告頻道發言 → 刪文 + 計次 + DM 警告 + 三犯禁言
         if in_announce and not message.author.guild_permissions.administrator:
@@ -211,32 +427,38 @@ class VicBot(commands.Bot):
                 warnings,
             )
 
-            # 刪除訊息
-            try:
-                await message.delete()
-                logger.info("訊息已刪除 | user_id=%s | message_id=%s", message.author.id, message.id)
-            except discord.DiscordException as exc:
+            # 刪除訊息與第 3 次違規的禁言互不相依，同時送出
+            mute_requested = warnings == 3 and isinstance(message.author, discord.Member)
+            calls = [message.delete()]
+            if mute_requested:
+                calls.append(
+                    message.author.timeout(
+                        timedelta(hours=self.announce_timeout_hours),
+                        reason=f"公告頻道違規發言 {warnings} 次",
+                    )
+                )
+            results = await asyncio.gather(*calls, return_exceptions=True)
+
+            if isinstance(results[0], Exception):
                 logger.error(
                     "刪除訊息失敗 | user_id=%s | message_id=%s | error=%s",
                     message.author.id,
                     message.id,
-                    exc,
+                    results[0],
                 )
-
-            # 準備警告訊息
-            if warnings == 1:
-                warn_message = f"⚠️ 您於 #{message.channel.name} 頻道沒有發言權限。\n\n這是您的第 1 次警告。"
-            elif warnings == 2:
-                warn_message = f"⚠️ 您於 #{message.channel.name} 頻道沒有發言權限。\n\n這是您的第 2 次警告，再違規將被禁言 {self.announce_timeout_hours} 小時。"
             else:
-                warn_message = f"⚠️ 您於 #{message.channel.name} 頻道沒有發言權限。\n\n這是您的第 {warnings} 次警告。"
+                logger.info("訊息已刪除 | user_id=%s | message_id=%s", message.author.id, message.id)
 
-            # 第 3 次違規執行禁言
             mute_applied = False
-            if warnings == 3 and isinstance(message.author, discord.Member):
-                until = utcnow() + timedelta(hours=self.announce_timeout_hours)  # tz-aware
-                try:
-                    await message.author.edit(timed_out_until=until)
+            if mute_requested:
+                if isinstance(results[1], Exception):
+                    logger.error(
+                        "設定禁言失敗 | user_id=%s | guild_id=%s | error=%s",
+                        message.author.id,
+                        message.guild.id,
+                        results[1],
+                    )
+                else:
                     mute_applied = True
                     # 禁言成功後重置警告計數
                     self._channel_warnings[key] = 0
@@ -246,54 +468,58 @@ class VicBot(commands.Bot):
                         message.guild.id,
                         self.announce_timeout_hours,
                     )
-                except discord.DiscordException as exc:
-                    logger.error(
-                        "設定禁言失敗 | user_id=%s | guild_id=%s | error=%s",
-                        message.author.id,
-                        message.guild.id,
-                        exc,
-                    )
 
-            # 更新私訊內容（如果禁言成功）
+            # 準備警告訊息（內容取決於禁言是否成功）
+            channel_name = message.channel.name
             if mute_applied:
-                warn_message = f"⚠️ 您已在 #{message.channel.name} 頻道違規發言 3 次。\n\n您已被禁言 {self.announce_timeout_hours} 小時，警告次數已重置。"
+                warn_message = self._warn_tpl_muted(channel=channel_name)
+            elif warnings == 1:
+                warn_message = self._warn_tpl_first(channel=channel_name)
+            elif warnings == 2:
+                warn_message = self._warn_tpl_second(channel=channel_name)
+            else:
+                warn_message = self._warn_tpl_nth(channel=channel_name, warnings=warnings)
+
+            # 私訊警告與禁言公告同時送出
+            announce = mute_applied and announcement_channel is not None
+            calls = [message.author.send(warn_message)]
+            if announce:
+                calls.append(
+                    announcement_channel.send(
+                        f"📢 使用者 <@{message.author.id}> 因違規發言 3 次，"
+                        f"已被禁言 {self.announce_timeout_hours} 小時。"
+                    )
+                )
+            results = await asyncio.gather(*calls, return_exceptions=True)
 
-            # 發送私訊警告
-            try:
-                await message.author.send(warn_message)
-                logger.info("警告私訊已發送 | user_id=%s | warnings=%s", message.author.id, warnings)
-            except discord.Forbidden:
+            if isinstance(results[0], discord.Forbidden):
                 logger.warning(
                     "無法發送私訊（用戶關閉私訊） | user_id=%s | warnings=%s",
                     message.author.id,
                     warnings,
                 )
-            except discord.DiscordException as exc:
+            elif isinstance(results[0], Exception):
                 logger.error(
                     "傳送警告訊息失敗 | user_id=%s | error=%s",
                     message.author.id,
-                    exc,
+                    results[0],
                 )
+            else:
+                logger.info("警告私訊已發送 | user_id=%s | warnings=%s", message.author.id, warnings)
 
-            # 禁言成功後在公告頻道發布公告
-            if mute_applied and announcement_channel:
-                try:
-                    announcement_message = (
-                        f"📢 使用者 <@{message.author.id}> 因違規發言 3 次，"
-                        f"已被禁言 {self.announce_timeout_hours} 小時。"
-                    )
-                    await announcement_channel.send(announcement_message)
-                    logger.info(
-                        "禁言公告已發布 | user_id=%s | channel_id=%s",
+            if announce:
+                if isinstance(results[1], Exception):
+                    logger.error(
+                        "發布禁言公告失敗 | user_id=%s | channel_id=%s | error=%s",
                         message.author.id,
                         announcement_channel.id,
+                        results[1],
                     )
-                except discord.DiscordException as exc:
-                    logger.error(
-                        "發布禁言公告失敗 | user_id=%s | channel_id=%s | error=%s",
+                else:
+                    logger.info(
+                        "禁言公告已發布 | user_id=%s | channel_id=%s",
                         message.author.id,
                         announcement_channel.id,
-                        exc,
                     )
 
             return  # 不再往下傳遞，避免觸發指令等
@@ -314,8 +540,7 @@ class VicBot(commands.Bot):
         """
         # 基本資訊記錄
         log_msg = f"新成員加入 | user_id={member.id} | user_name={member.name} | guild={member.guild.name}"
-        logger.info(log_msg)
-        await self._log_to_discord(log_msg, level="info")
+        self._dual_log("info", log_msg)
 
         # 追蹤執行狀態
         role_assigned = False
@@ -326,31 +551,26 @@ class VicBot(commands.Bot):
         role_name = self.config.auto_assign_role_name
 
         try:
-            target_role = discord.utils.get(member.guild.roles, name=role_name)
+            target_role = self._find_role(member.guild, role_name)
 
             if target_role:
                 await member.add_roles(target_role, reason="新成員自動指派")
                 role_assigned = True
                 log_msg = f"✅ 角色已指派 | user={member.name} | role={role_name}"
-                logger.info(log_msg)
-                await self._log_to_discord(log_msg, level="info")
+                self._dual_log("info", log_msg)
             else:
                 log_msg = f"❌ 找不到角色 | guild={member.guild.name} | role={role_name} | 請檢查角色是否存在"
-                logger.error(log_msg)
-                await self._log_to_discord(log_msg, level="error")
+                self._dual_log("error", log_msg)
 
         except discord.Forbidden:
             log_msg = f"❌ 指派角色失敗：權限不足 | user={member.name} | role={role_name} | 請確認 Bot 權限"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
         except discord.HTTPException as exc:
             log_msg = f"❌ 指派角色失敗：HTTP 錯誤 | user={member.name} | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
         except Exception as exc:
             log_msg = f"❌ 指派角色失敗：未知錯誤 | user={member.name} | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
 
         # ==================== 2. 發送歡迎私訊 ====================
         try:
@@ -358,21 +578,17 @@ class VicBot(commands.Bot):
             await member.send(welcome_msg)
             dm_sent = True
             log_msg = f"✅ 歡迎私訊已發送 | user={member.name}"
-            logger.info(log_msg)
-            await self._log_to_discord(log_msg, level="info")
+            self._dual_log("info", log_msg)
 
         except discord.Forbidden:
             log_msg = f"⚠️ 無法發送私訊（用戶關閉私訊） | user={member.name}"
-            logger.warning(log_msg)
-            await self._log_to_discord(log_msg, level="warning")
+            self._dual_log("warning", log_msg)
         except discord.HTTPException as exc:
             log_msg = f"❌ 發送私訊失敗：HTTP 錯誤 | user={member.name} | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
         except Exception as exc:
             log_msg = f"❌ 發送私訊失敗：未知錯誤 | user={member.name} | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
 
         # ==================== 3. 在歡迎頻道發布公告 ====================
         welcome_channel = None
@@ -381,27 +597,20 @@ class VicBot(commands.Bot):
         try:
             # 嘗試使用配置的歡迎頻道
             if self.config.welcome_channel_id:
-                welcome_channel = self.get_channel(self.config.welcome_channel_id)
-                if not welcome_channel:
-                    try:
-                        welcome_channel = await self.fetch_channel(self.config.welcome_channel_id)
-                    except discord.NotFound:
-                        log_msg = f"⚠️ 歡迎頻道不存在 | channel_id={self.config.welcome_channel_id} | 嘗試備援方案"
-                        logger.warning(log_msg)
-                        await self._log_to_discord(log_msg, level="warning")
+                try:
+                    welcome_channel = await self._resolve_channel(self.config.welcome_channel_id)
+                except discord.NotFound:
+                    log_msg = f"⚠️ 歡迎頻道不存在 | channel_id={self.config.welcome_channel_id} | 嘗試備援方案"
+                    self._dual_log("warning", log_msg)
 
             # 備援方案：搜尋名為「新成員歡迎」或「一般」的頻道
             if not welcome_channel:
                 for channel_name in ["新成員歡迎", "一般"]:
-                    welcome_channel = discord.utils.get(
-                        member.guild.text_channels,
-                        name=channel_name
-                    )
+                    welcome_channel = self._find_text_channel(member.guild, channel_name)
                     if welcome_channel:
                         fallback_used = True
                         log_msg = f"⚠️ 使用備援頻道 | channel=#{channel_name}"
-                        logger.warning(log_msg)
-                        await self._log_to_discord(log_msg, level="warning")
+                        self._dual_log("warning", log_msg)
                         break
 
             # 發送歡迎公告
@@ -411,57 +620,146 @@ class VicBot(commands.Bot):
                 announcement_sent = True
 
                 log_msg = f"✅ 歡迎公告已發布 | channel=#{welcome_channel.name} | fallback={fallback_used}"
-                logger.info(log_msg)
-                await self._log_to_discord(log_msg, level="info")
+                self._dual_log("info", log_msg)
             else:
                 log_msg = f"⚠️ 找不到歡迎頻道 | 請設定 WELCOME_CHANNEL_ID 或創建 #新成員歡迎 頻道"
-                logger.warning(log_msg)
-                await self._log_to_discord(log_msg, level="warning")
+                self._dual_log("warning", log_msg)
 
         except discord.Forbidden:
             log_msg = f"❌ 發送歡迎公告失敗：權限不足 | channel=#{welcome_channel.name if welcome_channel else 'Unknown'}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
         except discord.HTTPException as exc:
             log_msg = f"❌ 發送歡迎公告失敗：HTTP 錯誤 | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
         except Exception as exc:
             log_msg = f"❌ 發送歡迎公告失敗：未知錯誤 | error={exc}"
-            logger.error(log_msg)
-            await self._log_to_discord(log_msg, level="error")
+            self._dual_log("error", log_msg)
 
         # ==================== 4. 最終摘要日誌 ====================
         summary = (
             f"📊 新成員處理完成 | user={member.name} | "
             f"role_assigned={role_assigned} | dm_sent={dm_sent} | announcement_sent={announcement_sent}"
         )
-        logger.info(summary)
-        await self._log_to_discord(summary, level="info")
-
-    async def _send_private(self, ctx: commands.Context, message: str) -> None:
+        self._dual_log("info", summary)
+
+    async def _send_private(
+        self,
+        ctx: commands.Context,
+        message: Optional[str] = None,
+        *,
+        embed: Optional[discord.Embed] = None,
+    ) -> None:
         try:
-            await ctx.author.send(message)
+            await ctx.author.send(message, embed=embed)
             if ctx.guild:
                 await ctx.reply("已透過私訊提供資料，以保障資訊安全。", delete_after=30)
         except discord.Forbidden:
             await ctx.reply("無法傳送私訊，請確認私訊設定。")
 
-    @tasks.loop(minutes=10)
-    async def moi_sync_task(self) -> None:
+    def _add_job(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[None]],
+        when: float,
+        next_after: Callable[[float], float],
+    ) -> None:
+        heapq.heappush(self._schedule, (when, name, fn, next_after))
+        self._schedule_changed.set()
+
+    def _first_weekly(self, weekday: int, hour: int, *, catch_up: bool = False) -> float:
+        """回傳每週任務的首次執行時間；catch_up=True 且本週時段已過時立即執行（fn 需自行確保冪等）。"""
         now_local = datetime.now(self.local_tz)
-        week = now_local.isocalendar().week
-        if now_local.weekday() != 0 or now_local.hour != 9:
-            return
-        if self._last_moi_sync_week == week:
+        next_fire = _next_weekly(now_local, weekday, hour)
+        last_fire = next_fire - timedelta(days=7)
+        if catch_up and last_fire.isocalendar()[:2] == now_local.isocalendar()[:2]:
+            return now_local.timestamp()
+        return next_fire.timestamp()
+
+    def _weekly(self, weekday: int, hour: int) -> Callable[[float], float]:
+        def next_after(prev: float) -> float:
+            # 以上次的預定時間推算下一次，避免提早醒來時同一時段重複觸發
+            prev_local = datetime.fromtimestamp(prev, self.local_tz)
+            return _next_weekly(max(prev_local, datetime.now(self.local_tz)), weekday, hour).timestamp()
+
+        return next_after
+
+    async def _scheduler(self) -> None:
+        """單一協程依 min-heap 觸發到期的排程任務。"""
+        await self.wait_until_ready()
+        while not self.is_closed():
+            if self._schedule:
+                delay = self._schedule[0][0] - time.time()
+                if delay <= 0:
+                    when, name, fn, next_after = heapq.heappop(self._schedule)
+                    job = asyncio.create_task(self._run_job(when, name, fn, next_after))
+                    self._running_jobs.add(job)
+                    job.add_done_callback(self._running_jobs.discard)
+                    continue
+            else:
+                delay = None
+            # 睡到下一個任務到期，期間若有新任務加入則提早醒來重新檢查
+            self._schedule_changed.clear()
+            try:
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(
+        self,
+        when: float,
+        name: str,
+        fn: Callable[[], Awaitable[None]],
+        next_after: Callable[[float], float],
+    ) -> None:
+        try:
+            await fn()
+        except Exception:
+            logger.exception("排程任務執行失敗 | task=%s", name)
+        # 執行完才排入下一次，同一任務不會重疊執行
+        if not self.is_closed():
+            self._add_job(name, fn, next_after(when), next_after)
+
+    async def _do_moi_sync(self) -> None:
+        iso = datetime.now(self.local_tz).isocalendar()
+        iso_week = f"{iso.year}-W{iso.week:02d}"
+        # 跳過本週已推播的條件，重啟後補跑不會重複查詢與推播
+        done = await monitoring.synced_this_week(iso_week)
+
+        # 邊讀取邊分組：相同篩選條件的監控規則只查詢一次，再推播給所有訂閱者
+        groups: Dict[Tuple, List[monitoring.MonitoringRule]] = defaultdict(list)
+        rule_count = 0
+        async with database.connect() as db:
+            async for rule in monitoring.iter_rules(db):
+                if rule.id in done:
+                    continue
+                groups[(rule.area, rule.price_min, rule.price_max, rule.size_min, rule.size_max)].append(rule)
+                rule_count += 1
+        if not groups:
             return
+        logger.info("Running weekly MOI sync task | week=%s | rules=%s", iso_week, rule_count)
 
-        logger.info("Running weekly MOI sync task")
-        self._last_moi_sync_week = week
-        async with database.connect() as db:
-            rules = await monitoring.iter_rules(db)
-        for rule in rules:
-            listings = await market.fetch_latest_listings(
+        sem = asyncio.Semaphore(_FANOUT_CONCURRENCY)
+        rule_groups = list(groups.values())
+        results = await asyncio.gather(
+            *(self._process_rule_group(group, sem, iso_week) for group in rule_groups),
+            return_exceptions=True,
+        )
+        for group, result in zip(rule_groups, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "監控條件推播失敗 | rule_ids=%s | error=%s",
+                    [rule.id for rule in group],
+                    result,
+                )
+
+    async def _process_rule_group(
+        self, group: List[monitoring.MonitoringRule], sem: asyncio.Semaphore, iso_week: str
+    ) -> None:
+        """查詢並推播一組相同條件的監控規則；每位使用者推播成功後立即記錄，中斷後重跑不會重複推播。"""
+        rule = group[0]
+        async with sem:
+            listings = await _fetch_listings_cached(
+                self.http_session,
                 area=rule.area,
                 price_min=rule.price_min,
                 price_max=rule.price_max,
@@ -470,78 +768,179 @@ class VicBot(commands.Bot):
                 limit=10,
             )
             if not listings:
-                continue
-            user = self.get_user(rule.user_id) or await self.fetch_user(rule.user_id)
-            lines = ["符合監控條件的最新房源："]
-            for listing in listings:
-                lines.append(
-                    f"{listing.area} | {listing.price} 萬 | {listing.size} 坪 | {listing.address}"
-                )
-                if getattr(listing, "url", None):
-                    lines.append(listing.url)
-            await user.send("\n".join(lines))
-
-    @moi_sync_task.before_loop
-    async def before_moi_sync(self) -> None:
-        await self.wait_until_ready()
+                await monitoring.mark_synced([subscriber.id for subscriber in group], iso_week)
+                return
+            embed = _build_listings_embed("符合監控條件的最新房源", listings)
+            # 同一使用者可能設了多條相同條件，每人只解析與推播一次
+            by_user: Dict[int, List[monitoring.MonitoringRule]] = defaultdict(list)
+            for subscriber in group:
+                by_user[subscriber.user_id].append(subscriber)
+            for user_id, subscriptions in by_user.items():
+                try:
+                    user = await self._resolve_user(user_id, subscriptions[0].guild_id)
+                    await user.send(embed=embed)
+                except discord.DiscordException as exc:
+                    logger.error(
+                        "監控條件推播失敗 | rule_ids=%s | user_id=%s | error=%s",
+                        [subscriber.id for subscriber in subscriptions],
+                        user_id,
+                        exc,
+                    )
+                    continue
+                await monitoring.mark_synced([subscriber.id for subscriber in subscriptions], iso_week)
 
-    @tasks.loop(minutes=10)
-    async def weekly_report_task(self) -> None:
-        now_local = datetime.now(self.local_tz)
-        week = now_local.isocalendar().week
-        if now_local.weekday() != 0 or now_local.hour != 10:
-            return
-        if self._last_report_week == week:
-            return
+    async def _do_weekly_report(self) -> None:
         if not self.config.default_report_channel_id:
             return
-        channel = self.get_channel(self.config.default_report_channel_id)
-        if not channel:
-            try:
-                channel = await self.fetch_channel(self.config.default_report_channel_id)
-            except discord.NotFound:
-                logger.warning("Report channel not found: %s", self.config.default_report_channel_id)
-                return
-        summary = await market.generate_report(["全區"], days=7)
+        try:
+            channel = await self._resolve_channel(self.config.default_report_channel_id)
+        except discord.NotFound:
+            logger.warning("Report channel not found: %s", self.config.default_report_channel_id)
+            return
+        summary = await _generate_report_cached(self.http_session, 7)
         await channel.send(summary)
-        self._last_report_week = week
 
-    @weekly_report_task.before_loop
-    async def before_weekly_report(self) -> None:
-        await self.wait_until_ready()
-
-    @tasks.loop(minutes=1)
-    async def viewing_reminder_task(self) -> None:
-        now = datetime.utcnow()
+    async def _do_viewing_reminders(self) -> None:
+        now = datetime.now(timezone.utc)
         remind_before = now + timedelta(minutes=90)
         viewings_to_remind = await viewings.pending_reminders(before=remind_before)
+        if not viewings_to_remind:
+            return
+        # 同一建立者的多筆提醒只解析一次使用者，且彼此同時進行
+        creators = {viewing.creator_id: viewing.guild_id for viewing in viewings_to_remind}
+        resolved = await asyncio.gather(
+            *(self._resolve_user(user_id, guild_id) for user_id, guild_id in creators.items()),
+            return_exceptions=True,
+        )
+        users = dict(zip(creators, resolved))
+
+        sendable = []
         for viewing in viewings_to_remind:
-            scheduled_at = datetime.fromisoformat(viewing.scheduled_at)
-            user = self.get_user(viewing.creator_id) or await self.fetch_user(viewing.creator_id)
-            message = (
-                "看屋提醒：\n"
-                f"時間：{scheduled_at.strftime('%Y-%m-%d %H:%M')}\n"
-                f"客戶：{viewing.client}\n物件：{viewing.property}"
-            )
+            user = users[viewing.creator_id]
+            if isinstance(user, Exception):
+                logger.error("看屋提醒發送失敗 | viewing_id=%s | user_id=%s | error=%s", viewing.id, viewing.creator_id, user)
+            else:
+                sendable.append(viewing)
+
+        sem = asyncio.Semaphore(_FANOUT_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._send_viewing_reminder(viewing, users[viewing.creator_id], sem) for viewing in sendable),
+            return_exceptions=True,
+        )
+        reminded_ids = []
+        for viewing, result in zip(sendable, results):
+            if isinstance(result, Exception):
+                logger.error("看屋提醒發送失敗 | viewing_id=%s | user_id=%s | error=%s", viewing.id, viewing.creator_id, result)
+            else:
+                reminded_ids.append(viewing.id)
+        await viewings.mark_reminded_many(reminded_ids)
+
+    async def _send_viewing_reminder(
+        self, viewing: viewings.Viewing, user: discord.abc.User, sem: asyncio.Semaphore
+    ) -> None:
+        async with sem:
+            scheduled_at = datetime.fromtimestamp(viewing.scheduled_at, tz=self.local_tz)
+            parts = [
+                "看屋提醒：",
+                f"時間：{scheduled_at.strftime('%Y-%m-%d %H:%M')}",
+                f"客戶：{viewing.client}",
+                f"物件：{viewing.property}",
+            ]
             if viewing.agent:
-                message += f"\n指派業務：{viewing.agent}"
+                parts.append(f"指派業務：{viewing.agent}")
             if viewing.contact:
-                message += f"\n聯絡方式：{viewing.contact}"
+                parts.append(f"聯絡方式：{viewing.contact}")
             if viewing.note:
-                message += f"\n備註：{viewing.note}"
+                parts.append(f"備註：{viewing.note}")
             if viewing.link:
-                message += f"\n連結：{viewing.link}"
-            await user.send(message)
-            await viewings.mark_reminded(viewing.id)
-
-    @viewing_reminder_task.before_loop
-    async def before_viewing_reminder(self) -> None:
-        await self.wait_until_ready()
+                parts.append(f"連結：{viewing.link}")
+            await user.send("\n".join(parts))
 
 
 bot_instance: Optional[VicBot] = None
 
 
+def _pack_lines(lines: List[str], limit: int) -> List[str]:
+    """將多行依序合併為數則不超過 limit 字元的訊息（單行本身不超過 limit）。"""
+    messages: List[str] = []
+    current: List[str] = []
+    length = 0
+    for line in lines:
+        if current and length + 1 + len(line) > limit:
+            messages.append("\n".join(current))
+            current, length = [], 0
+        length += len(line) + (1 if current else 0)
+        current.append(line)
+    if current:
+        messages.append("\n".join(current))
+    return messages
+
+
+def _next_weekly(now: datetime, weekday: int, hour: int) -> datetime:
+    """回傳 now 之後下一個指定星期幾（0=週一）的整點時刻，沿用 now 的時區。"""
+    days_ahead = (weekday - now.weekday()) % 7
+    target = (now + timedelta(days=days_ahead)).replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=7)
+    return target
+
+
+async def _fetch_listings_cached(
+    session: Optional[aiohttp.ClientSession],
+    *,
+    area: str,
+    price_min: Optional[int],
+    price_max: Optional[int],
+    size_min: Optional[float],
+    size_max: Optional[float],
+    limit: int,
+) -> List[market.Listing]:
+    return await cached(
+        ("listings", area, price_min, price_max, size_min, size_max, limit),
+        _LISTINGS_CACHE_TTL,
+        lambda: market.fetch_latest_listings(
+            area=area,
+            price_min=price_min,
+            price_max=price_max,
+            size_min=size_min,
+            size_max=size_max,
+            limit=limit,
+            session=session,
+        ),
+    )
+
+
+async def _generate_report_cached(session: Optional[aiohttp.ClientSession], days: int) -> str:
+    return await cached(
+        ("report", "全區", days),
+        _MARKET_CACHE_TTL,
+        lambda: market.generate_report(["全區"], days, session=session),
+    )
+
+
+# 列表指令的單列格式
+_LISTING_FIELD_NAME = "{area} | {price} 萬 | {size} 坪".format
+_MONITOR_LINE = "{id}. {area} | 價格 {price} 萬 | 坪數 {size}".format
+_CASE_LINE = "{id}. {title} | 狀態 {status} | 區域 {area} | 指派 {assignee}".format
+_CLIENT_LINE = "{id}. {name} | 預算 {budget} | 偏好 {areas}".format
+_VIEWING_LINE = "{id}. {when} | 客戶 {client} | 物件 {prop} | 指派 {agent}".format
+
+
+def _build_listings_embed(title: str, listings: List[market.Listing]) -> discord.Embed:
+    """將房源整理成單一 Embed（每筆一個欄位），一次送出即可容納完整清單。"""
+    embed = discord.Embed(title=title, color=discord.Color.blue())
+    for listing in listings[:25]:  # Embed 最多 25 個欄位
+        value = listing.address
+        if getattr(listing, "url", None):
+            value = f"{value}\n{listing.url}"
+        embed.add_field(
+            name=_LISTING_FIELD_NAME(area=listing.area, price=listing.price, size=listing.size),
+            value=value[:1024],
+            inline=False,
+        )
+    return embed
+
+
 def _ensure_guild(ctx: commands.Context) -> bool:
     if ctx.guild is None:
         raise commands.NoPrivateMessage("此指令僅能在伺服器中使用。")
@@ -549,15 +948,18 @@ def _ensure_guild(ctx: commands.Context) -> bool:
 
 
 def _parse_key_values(parts: List[str]) -> dict:
+    # partition 一次掃描即可同時判斷並切開「鍵=值」
     result = {}
     for part in parts:
-        if "=" not in part:
-            continue
-        key, value = part.split("=", 1)
-        result[key] = value
+        key, sep, value = part.partition("=")
+        if sep:
+            result[key] = value
     return result
 
 
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
+
+
 @commands.command(name="監控新增")
 async def monitor_add(ctx: commands.Context, area: str, price_range: Optional[str] = None, size_range: Optional[str] = None):
     _ensure_guild(ctx)
@@ -582,12 +984,18 @@ async def monitor_list(ctx: commands.Context):
     if not rules:
         await ctx.reply("目前沒有監控條件。")
         return
-    lines = ["您的監控條件："]
-    for rule in rules:
-        price = f"{rule.price_min}-{rule.price_max}" if rule.price_min or rule.price_max else "不限"
-        size = f"{rule.size_min}-{rule.size_max}" if rule.size_min or rule.size_max else "不限"
-        lines.append(f"{rule.id}. {rule.area} | 價格 {price} 萬 | 坪數 {size}")
-    await ctx.reply("\n".join(lines))
+    await ctx.reply("\n".join([
+        "您的監控條件：",
+        *(
+            _MONITOR_LINE(
+                id=rule.id,
+                area=rule.area,
+                price=f"{rule.price_min}-{rule.price_max}" if rule.price_min or rule.price_max else "不限",
+                size=f"{rule.size_min}-{rule.size_max}" if rule.size_min or rule.size_max else "不限",
+            )
+            for rule in rules
+        ),
+    ]))
 
 
 @commands.command(name="監控刪除")
@@ -611,7 +1019,8 @@ async def object_search(
     _ensure_guild(ctx)
     price_min, price_max = parse_range(price_range)
     size_min, size_max = parse_float_range(size_range)
-    listings = await market.fetch_latest_listings(
+    listings = await _fetch_listings_cached(
+        bot_instance.http_session,
         area=area,
         price_min=price_min,
         price_max=price_max,
@@ -630,14 +1039,7 @@ async def object_search(
         await ctx.reply("目前查無符合條件的物件。")
         return
 
-    lines = ["最新物件："]
-    for listing in listings:
-        lines.append(
-            f"{listing.area} | {listing.price} 萬 | {listing.size} 坪 | {listing.address}"
-        )
-        if getattr(listing, "url", None):
-            lines.append(listing.url)
-    await bot_instance._send_private(ctx, "\n".join(lines))
+    await bot_instance._send_private(ctx, embed=_build_listings_embed("最新物件", listings))
 
 
 @commands.command(name="案件新增")
@@ -652,10 +1054,13 @@ async def case_add(ctx: commands.Context, *args: str):
     area = params.get("區域")
     price = params.get("價格")
     assignee = params.get("指派")
-    assignee_id = None
-    if assignee and ctx.message.mentions:
-        assignee_id = ctx.message.mentions[0].id
-    price_value = int(price.rstrip("萬")) if price else None
+    # 直接從「指派=<@id>」取出使用者 ID，不需解析整則訊息的 mentions
+    match = _MENTION_RE.match(assignee) if assignee else None
+    assignee_id = int(match.group(1)) if match else None
+    price_value = parse_price(price)
+    if price and price_value is None:
+        await ctx.reply("價格格式無法辨識，請輸入數字，例如 價格=3000萬")
+        return
     notes = params.get("備註")
 
     case_id = await cases.create_case(
@@ -686,13 +1091,19 @@ async def case_list(ctx: commands.Context, *args: str):
     if not case_list:
         await ctx.reply("沒有符合條件的案件。")
         return
-    lines = ["案件列表："]
-    for case_item in case_list:
-        assignee = f"<@{case_item.assignee_id}>" if case_item.assignee_id else "未指派"
-        lines.append(
-            f"{case_item.id}. {case_item.title} | 狀態 {case_item.status} | 區域 {case_item.area or '未填寫'} | 指派 {assignee}"
-        )
-    await ctx.reply("\n".join(lines))
+    await ctx.reply("\n".join([
+        "案件列表：",
+        *(
+            _CASE_LINE(
+                id=case_item.id,
+                title=case_item.title,
+                status=case_item.status,
+                area=case_item.area or "未填寫",
+                assignee=f"<@{case_item.assignee_id}>" if case_item.assignee_id else "未指派",
+            )
+            for case_item in case_list
+        ),
+    ]))
 
 
 @commands.command(name="案件更新")
@@ -767,11 +1178,18 @@ async def client_list(ctx: commands.Context):
     if not client_records:
         await ctx.reply("尚無客戶資料。")
         return
-    lines = ["您的客戶："]
-    for item in client_records:
-        budget = "-".join(str(b) for b in (item.budget_min or "", item.budget_max or "") if b)
-        lines.append(f"{item.id}. {item.name} | 預算 {budget or '未填寫'} | 偏好 {item.preferred_areas or '未填寫'}")
-    await bot_instance._send_private(ctx, "\n".join(lines))
+    await bot_instance._send_private(ctx, "\n".join([
+        "您的客戶：",
+        *(
+            _CLIENT_LINE(
+                id=item.id,
+                name=item.name,
+                budget="-".join(str(b) for b in (item.budget_min or "", item.budget_max or "") if b) or "未填寫",
+                areas=item.preferred_areas or "未填寫",
+            )
+            for item in client_records
+        ),
+    ]))
 
 
 @commands.command(name="客戶更新")
@@ -843,6 +1261,8 @@ async def viewing_add(ctx: commands.Context, datetime_part: str, time_part: str,
     if not dt:
         await ctx.reply("時間格式錯誤，請使用 YYYY-MM-DD HH:MM。")
         return
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=bot_instance.local_tz)
     parts = [p.strip() for p in details.split("|")]
     if len(parts) < 4:
         await ctx.reply("請依格式提供 客戶|物件|指派業務|聯絡方式|備註|連結。")
@@ -870,7 +1290,7 @@ async def viewing_add(ctx: commands.Context, datetime_part: str, time_part: str,
 @commands.command(name="看屋列表")
 async def viewing_list(ctx: commands.Context, days: Optional[int] = 7):
     _ensure_guild(ctx)
-    until = datetime.utcnow() + timedelta(days=days or 7)
+    until = datetime.now(bot_instance.local_tz) + (timedelta(days=days) if days else _ONE_WEEK)
     viewing_records = await viewings.list_viewings(
         guild_id=ctx.guild.id,
         creator_id=ctx.author.id,
@@ -879,19 +1299,29 @@ async def viewing_list(ctx: commands.Context, days: Optional[int] = 7):
     if not viewing_records:
         await ctx.reply("沒有即將到來的行程。")
         return
-    lines = ["看屋行程："]
-    for item in viewing_records:
-        scheduled_at = datetime.fromisoformat(item.scheduled_at)
-        lines.append(
-            f"{item.id}. {scheduled_at.strftime('%Y-%m-%d %H:%M')} | 客戶 {item.client} | 物件 {item.property} | 指派 {item.agent or '未填寫'}"
-        )
-    await bot_instance._send_private(ctx, "\n".join(lines))
+    await bot_instance._send_private(ctx, "\n".join([
+        "看屋行程：",
+        *(
+            _VIEWING_LINE(
+                id=item.id,
+                when=datetime.fromtimestamp(item.scheduled_at, tz=bot_instance.local_tz).strftime("%Y-%m-%d %H:%M"),
+                client=item.client,
+                prop=item.property,
+                agent=item.agent or "未填寫",
+            )
+            for item in viewing_records
+        ),
+    ]))
 
 
 @commands.command(name="行情")
 async def market_command(ctx: commands.Context, area: str, days: Optional[int] = 30):
     _ensure_guild(ctx)
-    summary = await market.fetch_market_summary(area, days)
+    summary = await cached(
+        ("market_summary", area, days),
+        _MARKET_CACHE_TTL,
+        lambda: market.fetch_market_summary(area, days, session=bot_instance.http_session),
+    )
     message = (
         f"{area} 近 {days} 天行情：\n"
         f"平均單價：{summary.average_price or 'N/A'}\n"
@@ -904,7 +1334,7 @@ async def market_command(ctx: commands.Context, area: str, days: Optional[int] =
 @commands.command(name="報表")
 async def report_command(ctx: commands.Context, days: Optional[int] = 7):
     _ensure_guild(ctx)
-    summary = await market.generate_report(["全區"], days)
+    summary = await _generate_report_cached(bot_instance.http_session, days)
     await ctx.reply(summary)
 
 
@@ -922,8 +1352,7 @@ async def price_query_command(ctx: commands.Context, *, area: str):
 
     # 記錄查詢請求
     log_msg = f"房價查詢請求 | user={ctx.author.name} | area={area} | guild={ctx.guild.name}"
-    logger.info(log_msg)
-    await bot_instance._log_to_discord(log_msg, level="info")
+    bot_instance._dual_log("info", log_msg)
 
     # 發送「正在查詢」訊息
     processing_msg = await ctx.reply(f"🔍 正在查詢「{area}」的房價資料，請稍候...")
@@ -955,40 +1384,30 @@ async def price_query_command(ctx: commands.Context, *, area: str):
         # 建案分組展示（核心功能）
         if stats.project_groups:
             # 限制顯示最多 10 個分組（避免 Embed 過長）
-            groups_to_show = stats.project_groups[:10]
-
-            for group in groups_to_show:
-                # 建案標題
-                group_title = f"🏢 {group.road_name} {group.address_range}"
-                if group.transaction_count > 1:
-                    group_title += " (推測同社區)"
-
-                # 建案詳情
-                group_value = (
-                    f"**成交筆數：** {group.transaction_count} 筆\n"
-                    f"**平均總價：** {group.avg_price:.2f} 萬元\n"
-                    f"**平均單價：** {group.avg_unit_price:.2f} 萬/坪\n"
-                    f"**成交門牌：** {', '.join(group.addresses[:10])}"  # 最多顯示 10 個門牌
+            # 先一次組好 (標題, 內容)，再逐一 add_field
+            group_fields = [
+                (
+                    f"🏢 {group.road_name} {group.address_range}"
+                    + (" (推測同社區)" if group.transaction_count > 1 else ""),
+                    "\n".join([
+                        f"**成交筆數：** {group.transaction_count} 筆",
+                        f"**平均總價：** {group.avg_price:.2f} 萬元",
+                        f"**平均單價：** {group.avg_unit_price:.2f} 萬/坪",
+                        # 最多顯示 10 個門牌，太多時顯示「等 N 筆」
+                        f"**成交門牌：** {', '.join(group.addresses[:10])}"
+                        + (f" 等 {group.transaction_count} 筆" if len(group.addresses) > 10 else ""),
+                    ]),
                 )
+                for group in stats.project_groups[:10]
+            ]
 
-                # 如果門牌太多，顯示「等 N 筆」
-                if len(group.addresses) > 10:
-                    group_value += f" 等 {group.transaction_count} 筆"
-
+            for group_title, group_value in group_fields:
                 embed.add_field(
                     name=group_title,
                     value=group_value,
                     inline=False
                 )
 
-            # 如果分組太多，提示有更多分組
-            if len(stats.project_groups) > 10:
-                embed.add_field(
-                    name="📋 更多分組",
-                    value=f"還有 {len(stats.project_groups) - 10} 個建案分組未顯示",
-                    inline=False
-                )
-
         # 價格區間
         embed.add_field(
             name="💰 價格區間",
@@ -1002,23 +1421,11 @@ async def price_query_command(ctx: commands.Context, *, area: str):
         )
 
         # 資料來源聲明（合法授權）
-        from src.services import data_downloader
         cache_info = data_downloader.get_taichung_cache_info()
-
-        data_source_text = "數據來源：內政部不動產成交案件實價登錄"
-        if cache_info and cache_info.get("version"):
-            data_source_text += f" ({cache_info['version']})"
-
-        # 授權聲明
-        license_text = "\n依政府資料開放授權條款 (OGDL) 第1版公眾釋出"
-
+        version = cache_info.get("version") if cache_info else None
         embed.add_field(
             name="📄 資料來源與授權",
-            value=(
-                f"{data_source_text}\n"
-                f"{license_text}\n"
-                f"授權連結：https://data.gov.tw/license"
-            ),
+            value=f"{_DATA_SOURCE_TEXT} ({version})\n{_LICENSE_BLOCK}" if version else _DATA_SOURCE_BLOCK,
             inline=False
         )
 
@@ -1032,16 +1439,46 @@ async def price_query_command(ctx: commands.Context, *, area: str):
             icon_url=ctx.author.avatar.url if ctx.author.avatar else None
         )
 
+        # 如果分組太多，提示有更多分組；整個 Embed 超過 Discord 上限時，
+        # 從最後一個建案分組往前刪，免得送出後才被 API 以 400 退回
+        shown = min(len(stats.project_groups), 10)
+        while True:
+            hidden = len(stats.project_groups) - shown
+            if hidden:
+                embed.insert_field_at(
+                    1 + shown,
+                    name="📋 更多分組",
+                    value=f"還有 {hidden} 個建案分組未顯示",
+                    inline=False
+                )
+            if len(embed) <= _EMBED_TOTAL_LIMIT or not shown:
+                break
+            if hidden:
+                embed.remove_field(1 + shown)
+            shown -= 1
+            embed.remove_field(1 + shown)
+
         # 刪除「正在查詢」訊息
         await processing_msg.delete()
 
         # 發送結果
-        await ctx.reply(embed=embed)
+        try:
+            await ctx.reply(embed=embed)
+        except discord.HTTPException as exc:
+            # 長度以外的欄位限制仍可能被拒絕，改回覆精簡文字
+            bot_instance._dual_log(
+                "warning",
+                f"⚠️ 房價查詢 Embed 發送失敗 | user={ctx.author.name} | area={area} | size={len(embed)} | error={exc}",
+            )
+            await ctx.reply(
+                f"📊 {stats.area}：共 {stats.total_transactions} 筆成交，"
+                f"平均總價 {stats.avg_price:.2f} 萬元，平均單價 {stats.avg_unit_price:.2f} 萬/坪"
+            )
+            return
 
         # 記錄成功日誌
         log_msg = f"✅ 房價查詢成功 | user={ctx.author.name} | area={area} | transactions={stats.total_transactions}"
-        logger.info(log_msg)
-        await bot_instance._log_to_discord(log_msg, level="info")
+        bot_instance._dual_log("info", log_msg)
 
     except ValueError as exc:
         # 使用者輸入錯誤（例如：地區不存在）
@@ -1055,8 +1492,7 @@ async def price_query_command(ctx: commands.Context, *, area: str):
 
         # 記錄警告日誌
         log_msg = f"⚠️ 房價查詢失敗（用戶輸入） | user={ctx.author.name} | area={area} | error={exc}"
-        logger.warning(log_msg)
-        await bot_instance._log_to_discord(log_msg, level="warning")
+        bot_instance._dual_log("warning", log_msg)
 
     except asyncio.TimeoutError:
         # 查詢超時
@@ -1070,8 +1506,7 @@ async def price_query_command(ctx: commands.Context, *, area: str):
 
         # 記錄錯誤日誌
         log_msg = f"❌ 房價查詢超時 | user={ctx.author.name} | area={area}"
-        logger.error(log_msg)
-        await bot_instance._log_to_discord(log_msg, level="error")
+        bot_instance._dual_log("error", log_msg)
 
     except Exception as exc:
         # 其他未知錯誤
@@ -1086,35 +1521,43 @@ async def price_query_command(ctx: commands.Context, *, area: str):
         # 記錄錯誤日誌
         log_msg = f"🚨 房價查詢失敗（系統錯誤） | user={ctx.author.name} | area={area} | error={exc}"
         logger.error(log_msg, exc_info=True)
-        await bot_instance._log_to_discord(log_msg, level="error")
+        bot_instance._log_to_discord(log_msg, level="error")
+
+
+COMMANDS = (
+    monitor_add,
+    monitor_list,
+    monitor_delete,
+    object_search,
+    case_add,
+    case_list,
+    case_update,
+    case_view,
+    client_add,
+    client_list,
+    client_update,
+    client_followup,
+    client_records,
+    viewing_add,
+    viewing_list,
+    market_command,
+    report_command,
+    price_query_command,
+)
 
 
 async def main() -> None:
+    # .env 僅在程序啟動時載入一次，不在 import 階段執行
+    load_dotenv()
+    logger.info("DISCORD_TOKEN loaded? %s", bool(os.getenv("DISCORD_TOKEN")))
     config = load_config()
     global bot_instance
     bot_instance = VicBot(config=config)
-    for command in [
-        monitor_add,
-        monitor_list,
-        monitor_delete,
-        object_search,
-        case_add,
-        case_list,
-        case_update,
-        case_view,
-        client_add,
-        client_list,
-        client_update,
-        client_followup,
-        client_records,
-        viewing_add,
-        viewing_list,
-        market_command,
-        report_command,
-        price_query_command,
-    ]:
+    for command in COMMANDS:
         bot_instance.add_command(command)
-    await bot_instance.start(config.token)
+    # 離開時（含登入失敗、Ctrl-C）一定執行 close()，關閉資料庫連線與背景工作
+    async with bot_instance:
+        await bot_instance.start(config.token)
 
 
 if __name__ == "__main__":
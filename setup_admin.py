@@ -18,20 +18,20 @@ async def main():
 
     # 導入模組
     from web_api.auth.users import init_users_table, create_user, get_user_by_discord_id
-    from src.database import init_db
+    from src.database import close_db, init_db
 
-    # 初始化資料庫
-    print("📦 初始化資料庫...")
-    await init_db()
-    await init_users_table()
-    print("✅ 資料庫初始化完成")
-    print()
+    try:
+        # 初始化資料庫
+        print("📦 初始化資料庫...")
+        await init_db()
+        await init_users_table()
+        print("✅ 資料庫初始化完成")
+        print()
 
-    # 獲取用戶輸入
-    print("請輸入管理員資訊：")
-    print()
+        # 獲取用戶輸入
+        print("請輸入管理員資訊：")
+        print()
 
-    try:
         discord_id = int(input("Discord ID（右鍵點擊頭像複製）: "))
         username = input("用戶名稱: ")
         guild_id = int(input("Discord 伺服器 ID（右鍵點擊伺服器圖示複製）: "))
@@ -96,6 +96,9 @@ async def main():
         print("\n\n⏹️  設置已取消")
     except Exception as e:
         print(f"\n❌ 設置失敗：{e}")
+    finally:
+        # 共用連線的背景執行緒不會自行結束，不關閉程序會卡在結束階段
+        await close_db()
 
 
 if __name__ == "__main__":
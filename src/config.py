@@ -3,8 +3,29 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
+# 未設定 WELCOME_MESSAGE 時使用的歡迎私訊
+_DEFAULT_WELCOME_MESSAGE = (
+    "🎉 歡迎加入 HomescoutTaiChung！\n\n"
+    "您已被自動指派「客戶」角色，可以存取以下頻道：\n\n"
+    "📢 **資訊頻道**\n"
+    "• #公告 - 重要訊息公告\n"
+    "• #資源 - 房源資源分享\n"
+    "• #常見問題 - 常見問題解答\n\n"
+    "💬 **互動頻道**\n"
+    "• #一般 - 一般討論\n"
+    "• #新房推播 - 最新房源推播\n"
+    "• #找房需求 - 發布找房需求\n\n"
+    "🤖 **Bot 指令說明**\n"
+    "• `!監控新增 <區域> <價格範圍> <坪數範圍>` - 新增房源監控\n"
+    "• `!監控列表` - 查看您的監控條件\n"
+    "• `!物件查詢 <區域> <價格範圍> <坪數範圍>` - 搜尋房源\n"
+    "• `!客戶新增 <姓名> <預算範圍> <偏好區域>` - 新增客戶資料\n\n"
+    "如有任何問題，請聯繫管理員。祝您找到理想的房子！ 🏠"
+)
+
 
 @dataclass
 class BotConfig:
@@ -21,27 +42,12 @@ class BotConfig:
     # 房價查詢設定
     price_query_enabled: bool = True  # 是否啟用房價查詢
     price_cache_ttl_hours: int = 24  # 快取有效期限（小時）
-    welcome_message: str = (
-        "🎉 歡迎加入 HomescoutTaiChung！\n\n"
-        "您已被自動指派「客戶」角色，可以存取以下頻道：\n\n"
-        "📢 **資訊頻道**\n"
-        "• #公告 - 重要訊息公告\n"
-        "• #資源 - 房源資源分享\n"
-        "• #常見問題 - 常見問題解答\n\n"
-        "💬 **互動頻道**\n"
-        "• #一般 - 一般討論\n"
-        "• #新房推播 - 最新房源推播\n"
-        "• #找房需求 - 發布找房需求\n\n"
-        "🤖 **Bot 指令說明**\n"
-        "• `!監控新增 <區域> <價格範圍> <坪數範圍>` - 新增房源監控\n"
-        "• `!監控列表` - 查看您的監控條件\n"
-        "• `!物件查詢 <區域> <價格範圍> <坪數範圍>` - 搜尋房源\n"
-        "• `!客戶新增 <姓名> <預算範圍> <偏好區域>` - 新增客戶資料\n\n"
-        "如有任何問題，請聯繫管理員。祝您找到理想的房子！ 🏠"
-    )
+    welcome_message: str = _DEFAULT_WELCOME_MESSAGE
 
 
+@lru_cache(maxsize=1)
 def load_config() -> BotConfig:
+    """讀取環境變數建立設定；結果會快取，多個進入點共用同一份設定。"""
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         raise RuntimeError("DISCORD_TOKEN environment variable must be set")
@@ -77,26 +83,7 @@ def load_config() -> BotConfig:
     price_cache_ttl_raw = os.getenv("PRICE_CACHE_TTL_HOURS")
     price_cache_ttl = int(price_cache_ttl_raw) if price_cache_ttl_raw else 24
 
-    welcome_msg = os.getenv("WELCOME_MESSAGE")
-    if not welcome_msg:
-        welcome_msg = (
-            "🎉 歡迎加入 HomescoutTaiChung！\n\n"
-            "您已被自動指派「客戶」角色，可以存取以下頻道：\n\n"
-            "📢 **資訊頻道**\n"
-            "• #公告 - 重要訊息公告\n"
-            "• #資源 - 房源資源分享\n"
-            "• #常見問題 - 常見問題解答\n\n"
-            "💬 **互動頻道**\n"
-            "• #一般 - 一般討論\n"
-            "• #新房推播 - 最新房源推播\n"
-            "• #找房需求 - 發布找房需求\n\n"
-            "🤖 **Bot 指令說明**\n"
-            "• `!監控新增 <區域> <價格範圍> <坪數範圍>` - 新增房源監控\n"
-            "• `!監控列表` - 查看您的監控條件\n"
-            "• `!物件查詢 <區域> <價格範圍> <坪數範圍>` - 搜尋房源\n"
-            "• `!客戶新增 <姓名> <預算範圍> <偏好區域>` - 新增客戶資料\n\n"
-            "如有任何問題，請聯繫管理員。祝您找到理想的房子！ 🏠"
-        )
+    welcome_msg = os.getenv("WELCOME_MESSAGE") or _DEFAULT_WELCOME_MESSAGE
 
     return BotConfig(
         token=token,
@@ -2,18 +2,30 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
+from zoneinfo import ZoneInfo
 
 import aiosqlite
 
+from .utils.formatting import split_areas
+
+logger = logging.getLogger(__name__)
+
 _DB_PATH = Path("vicbot.db")
+_STATEMENT_CACHE_SIZE = 256
+# async for 逐批讀取時每次向背景執行緒取回的列數（aiosqlite 預設 64）
+_ITER_CHUNK_SIZE = 512
 
 
-async def init_db() -> None:
-    async with aiosqlite.connect(_DB_PATH) as db:
-        await db.execute("PRAGMA foreign_keys = ON;")
+async def init_db(timezone: str = "Asia/Taipei") -> None:
+    # 建表與遷移直接使用共用連線，啟動時只開一次資料庫
+    async with connect() as db:
+        # WAL 模式寫在資料庫檔案內，設定一次即可；讀取不再被寫入阻擋
+        await db.execute("PRAGMA journal_mode = WAL;")
         await db.executescript(
             """
             CREATE TABLE IF NOT EXISTS monitoring (
@@ -28,6 +40,13 @@ async def init_db() -> None:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
 
+            CREATE TABLE IF NOT EXISTS rule_sync_log (
+                rule_id INTEGER NOT NULL REFERENCES monitoring(id) ON DELETE CASCADE,
+                iso_week TEXT NOT NULL,
+                synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (rule_id, iso_week)
+            );
+
             CREATE TABLE IF NOT EXISTS cases (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 guild_id INTEGER NOT NULL,
@@ -86,11 +105,17 @@ async def init_db() -> None:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
 
+            CREATE TABLE IF NOT EXISTS client_areas (
+                client_id INTEGER NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+                area TEXT NOT NULL,
+                PRIMARY KEY (client_id, area)
+            );
+
             CREATE TABLE IF NOT EXISTS viewings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 guild_id INTEGER NOT NULL,
                 creator_id INTEGER NOT NULL,
-                scheduled_at TIMESTAMP NOT NULL,
+                scheduled_at INTEGER NOT NULL,  -- Unix epoch 秒數
                 client TEXT NOT NULL,
                 property TEXT NOT NULL,
                 agent TEXT,
@@ -100,21 +125,106 @@ async def init_db() -> None:
                 reminded INTEGER DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
+
+            CREATE INDEX IF NOT EXISTS idx_monitoring_user ON monitoring(user_id, guild_id);
+            CREATE INDEX IF NOT EXISTS idx_cases_filter ON cases(guild_id, status, area);
+            CREATE INDEX IF NOT EXISTS idx_cases_creator ON cases(guild_id, creator_id);
+            CREATE INDEX IF NOT EXISTS idx_cases_assignee ON cases(guild_id, assignee_id);
+            CREATE INDEX IF NOT EXISTS idx_case_updates_case ON case_updates(case_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_case_updates_user ON case_updates(user_id, case_id);
+            CREATE INDEX IF NOT EXISTS idx_clients_owner ON clients(guild_id, owner_id, updated_at);
+            CREATE INDEX IF NOT EXISTS idx_client_areas_area ON client_areas(area);
+            CREATE INDEX IF NOT EXISTS idx_followups_client ON client_followups(client_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_viewings_pending ON viewings(reminded, scheduled_at);
+            CREATE INDEX IF NOT EXISTS idx_viewings_user ON viewings(guild_id, creator_id, scheduled_at);
             """
         )
+        await _migrate_viewings_to_epoch(db, ZoneInfo(timezone))
+        await _backfill_client_areas(db)
         await db.commit()
 
 
-@asynccontextmanager
-async def connect() -> AsyncIterator[aiosqlite.Connection]:
-    db = await aiosqlite.connect(_DB_PATH)
-    try:
-        await db.execute("PRAGMA foreign_keys = ON;")
-        db.row_factory = aiosqlite.Row
-        yield db
-    finally:
-        await db.close()
+async def _migrate_viewings_to_epoch(db: aiosqlite.Connection, local_tz: ZoneInfo) -> None:
+    """將舊版以 ISO 字串儲存的 viewings.scheduled_at 轉為 epoch 秒數。
 
+    舊資料若無時區資訊，視為 local_tz 的當地時間。
+    """
+    cursor = await db.execute("SELECT id, scheduled_at FROM viewings WHERE typeof(scheduled_at) = 'text'")
+    rows = await cursor.fetchall()
+    if not rows:
+        return
 
-def run_sync(coro):
-    return asyncio.get_event_loop().run_until_complete(coro)
+    updates = []
+    for viewing_id, value in rows:
+        try:
+            scheduled_at = datetime.fromisoformat(value)
+        except ValueError:
+            # 保留原值不覆寫；此列不會出現在看屋列表與提醒中，每次啟動都會再次提示需手動修正
+            logger.warning("無法轉換看屋時間，需手動修正 | viewing_id=%s | value=%s", viewing_id, value)
+            continue
+        if scheduled_at.tzinfo is None:
+            scheduled_at = scheduled_at.replace(tzinfo=local_tz)
+        updates.append((int(scheduled_at.timestamp()), viewing_id))
+
+    if updates:
+        await db.executemany("UPDATE viewings SET scheduled_at = ? WHERE id = ?", updates)
+        logger.info("看屋時間已轉換為 epoch 秒數 | rows=%s", len(updates))
+
+
+async def _backfill_client_areas(db: aiosqlite.Connection) -> None:
+    """為建立 client_areas 之前的客戶補上偏好區域索引資料。"""
+    cursor = await db.execute(
+        """
+        SELECT id, preferred_areas FROM clients
+        WHERE preferred_areas IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM client_areas WHERE client_id = clients.id)
+        """
+    )
+    rows = await cursor.fetchall()
+    if not rows:
+        return
+
+    pairs = [(client_id, area) for client_id, value in rows for area in split_areas(value)]
+    await db.executemany("INSERT OR IGNORE INTO client_areas (client_id, area) VALUES (?, ?)", pairs)
+    logger.info("客戶偏好區域已建立索引 | clients=%s | areas=%s", len(rows), len(pairs))
+
+
+_connection: Optional[aiosqlite.Connection] = None
+_lock: Optional[asyncio.Lock] = None
+
+
+@asynccontextmanager
+async def connect() -> AsyncIterator[aiosqlite.Connection]:
+    """取得共用的資料庫連線。
+
+    SQLite 本身即序列化寫入，因此整個程序共用一條連線並以 asyncio.Lock 保護，
+    省去每次呼叫都重新開啟連線的成本。區塊內發生例外時會自動 rollback。
+    """
+    global _connection, _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        if _connection is None:
+            # 常駐連線讓 sqlite3 的 prepared statement 快取（cached_statements）持續生效
+            db = await aiosqlite.connect(
+                _DB_PATH, iter_chunk_size=_ITER_CHUNK_SIZE, cached_statements=_STATEMENT_CACHE_SIZE
+            )
+            await db.execute("PRAGMA foreign_keys = ON;")
+            await db.execute("PRAGMA synchronous = NORMAL;")
+            await db.execute("PRAGMA cache_size = -65536;")  # 64 MiB page cache
+            await db.execute("PRAGMA temp_store = MEMORY;")
+            await db.execute("PRAGMA mmap_size = 268435456;")  # 256 MiB 記憶體映射讀取
+            db.row_factory = aiosqlite.Row
+            _connection = db
+        try:
+            yield _connection
+        except BaseException:
+            await _connection.rollback()
+            raise
+
+
+async def close_db() -> None:
+    global _connection
+    if _connection is not None:
+        await _connection.close()
+        _connection = None
@@ -7,7 +7,7 @@ from typing import List, Optional
 from .. import database
 
 
-@dataclass
+@dataclass(slots=True)
 class Case:
     id: int
     guild_id: int
@@ -22,7 +22,7 @@ class Case:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CaseUpdate:
     id: int
     case_id: int
@@ -32,6 +32,11 @@ class CaseUpdate:
     created_at: str
 
 
+# 欄位順序與 dataclass 一致，查詢結果可直接依位置建立物件
+_CASE_COLUMNS = "id, guild_id, creator_id, title, area, price, status, assignee_id, notes, created_at, updated_at"
+_CASE_UPDATE_COLUMNS = "id, case_id, user_id, status, note, created_at"
+
+
 async def create_case(
     *,
     guild_id: int,
@@ -70,12 +75,16 @@ async def list_cases(
     status: Optional[str] = None,
     area: Optional[str] = None,
 ) -> List[Case]:
-    query = """
-        SELECT DISTINCT c.*
+    # 以 EXISTS 取代 LEFT JOIN + DISTINCT，避免每筆案件依更新紀錄數量重複展開
+    query = f"""
+        SELECT {_CASE_COLUMNS}
         FROM cases c
-        LEFT JOIN case_updates cu ON cu.case_id = c.id
         WHERE c.guild_id = ?
-          AND (c.creator_id = ? OR c.assignee_id = ? OR cu.user_id = ?)
+          AND (
+            c.creator_id = ?
+            OR c.assignee_id = ?
+            OR EXISTS (SELECT 1 FROM case_updates cu WHERE cu.case_id = c.id AND cu.user_id = ?)
+          )
     """
     params: List[object] = [guild_id, user_id, user_id, user_id]
 
@@ -91,7 +100,7 @@ async def list_cases(
     async with database.connect() as db:
         cursor = await db.execute(query, params)
         rows = await cursor.fetchall()
-        return [Case(**dict(row)) for row in rows]
+        return [Case(*row) for row in rows]
 
 
 async def update_case(
@@ -103,14 +112,17 @@ async def update_case(
     note: Optional[str],
 ) -> bool:
     async with database.connect() as db:
+        # 權限檢查與寫入更新紀錄合併成一句：只有建立者或負責人能讓 INSERT 寫入資料列
         cursor = await db.execute(
-            "SELECT creator_id, assignee_id FROM cases WHERE id = ? AND guild_id = ?",
-            (case_id, guild_id),
+            """
+            INSERT INTO case_updates (case_id, user_id, status, note)
+            SELECT id, ?, ?, ? FROM cases
+            WHERE id = ? AND guild_id = ? AND ? IN (creator_id, assignee_id)
+            """,
+            (user_id, status, note, case_id, guild_id, user_id),
         )
-        row = await cursor.fetchone()
-        if not row:
-            return False
-        if user_id not in (row["creator_id"], row["assignee_id"]):
+        if cursor.rowcount == 0:
+            await db.rollback()  # 沒寫入任何資料也已開啟交易，需釋放寫入鎖
             return False
 
         updates = []
@@ -127,13 +139,6 @@ async def update_case(
                 f"UPDATE cases SET {', '.join(updates)} WHERE id = ? AND guild_id = ?",
                 params,
             )
-        await db.execute(
-            """
-            INSERT INTO case_updates (case_id, user_id, status, note)
-            VALUES (?, ?, ?, ?)
-            """,
-            (case_id, user_id, status, note),
-        )
         await db.commit()
         return True
 
@@ -141,18 +146,18 @@ async def update_case(
 async def get_case(*, case_id: int, guild_id: int) -> Optional[Case]:
     async with database.connect() as db:
         cursor = await db.execute(
-            "SELECT * FROM cases WHERE id = ? AND guild_id = ?",
+            f"SELECT {_CASE_COLUMNS} FROM cases WHERE id = ? AND guild_id = ?",
             (case_id, guild_id),
         )
         row = await cursor.fetchone()
-        return Case(**dict(row)) if row else None
+        return Case(*row) if row else None
 
 
 async def list_case_updates(*, case_id: int) -> List[CaseUpdate]:
     async with database.connect() as db:
         cursor = await db.execute(
-            "SELECT * FROM case_updates WHERE case_id = ? ORDER BY created_at DESC",
+            f"SELECT {_CASE_UPDATE_COLUMNS} FROM case_updates WHERE case_id = ? ORDER BY created_at DESC",
             (case_id,),
         )
         rows = await cursor.fetchall()
-        return [CaseUpdate(**dict(row)) for row in rows]
+        return [CaseUpdate(*row) for row in rows]
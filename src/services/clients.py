@@ -5,9 +5,10 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 from .. import database
+from ..utils.formatting import split_areas
 
 
-@dataclass
+@dataclass(slots=True)
 class Client:
     id: int
     guild_id: int
@@ -21,7 +22,7 @@ class Client:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ClientFollowup:
     id: int
     client_id: int
@@ -30,6 +31,13 @@ class ClientFollowup:
     created_at: str
 
 
+# 欄位順序與 dataclass 一致，查詢結果可直接依位置建立物件
+_CLIENT_COLUMNS = "id, guild_id, owner_id, name, budget_min, budget_max, preferred_areas, description, created_at, updated_at"
+_FOLLOWUP_COLUMNS = "id, client_id, user_id, note, created_at"
+_CLIENT_COLUMNS_C = ", ".join(f"c.{column}" for column in _CLIENT_COLUMNS.split(", "))
+_FOLLOWUP_COLUMNS_F = ", ".join(f"f.{column}" for column in _FOLLOWUP_COLUMNS.split(", "))
+
+
 async def create_client(
     *,
     guild_id: int,
@@ -48,18 +56,39 @@ async def create_client(
             """,
             (guild_id, owner_id, name, budget_min, budget_max, preferred_areas, description),
         )
+        client_id = cursor.lastrowid
+        await db.executemany(
+            "INSERT INTO client_areas (client_id, area) VALUES (?, ?)",
+            [(client_id, area) for area in split_areas(preferred_areas)],
+        )
         await db.commit()
-        return cursor.lastrowid
+        return client_id
 
 
 async def list_clients(*, guild_id: int, owner_id: int) -> List[Client]:
     async with database.connect() as db:
         cursor = await db.execute(
-            "SELECT * FROM clients WHERE guild_id = ? AND owner_id = ? ORDER BY updated_at DESC",
+            f"SELECT {_CLIENT_COLUMNS} FROM clients WHERE guild_id = ? AND owner_id = ? ORDER BY updated_at DESC",
             (guild_id, owner_id),
         )
         rows = await cursor.fetchall()
-        return [Client(**dict(row)) for row in rows]
+        return [Client(*row) for row in rows]
+
+
+async def list_clients_by_area(*, guild_id: int, area: str) -> List[Client]:
+    """列出偏好區域包含 area 的客戶（完整比對區域名稱）。"""
+    async with database.connect() as db:
+        cursor = await db.execute(
+            f"""
+            SELECT {_CLIENT_COLUMNS_C} FROM client_areas a
+            JOIN clients c ON c.id = a.client_id
+            WHERE a.area = ? AND c.guild_id = ?
+            ORDER BY c.updated_at DESC
+            """,
+            (area, guild_id),
+        )
+        rows = await cursor.fetchall()
+        return [Client(*row) for row in rows]
 
 
 async def update_client(
@@ -87,6 +116,12 @@ async def update_client(
             f"UPDATE clients SET {columns} WHERE id = ? AND guild_id = ?",
             values,
         )
+        if "preferred_areas" in updates:
+            await db.execute("DELETE FROM client_areas WHERE client_id = ?", (client_id,))
+            await db.executemany(
+                "INSERT INTO client_areas (client_id, area) VALUES (?, ?)",
+                [(client_id, area) for area in split_areas(updates["preferred_areas"])],
+            )
         await db.commit()
         return True
 
@@ -99,45 +134,45 @@ async def add_followup(
     note: str,
 ) -> bool:
     async with database.connect() as db:
+        # 權限檢查與寫入合併成一句：只有客戶擁有者能讓 INSERT 寫入資料列
         cursor = await db.execute(
-            "SELECT owner_id FROM clients WHERE id = ? AND guild_id = ?",
-            (client_id, guild_id),
+            """
+            INSERT INTO client_followups (client_id, user_id, note)
+            SELECT id, ?, ? FROM clients
+            WHERE id = ? AND guild_id = ? AND owner_id = ?
+            """,
+            (user_id, note, client_id, guild_id, user_id),
         )
-        row = await cursor.fetchone()
-        if not row or row["owner_id"] != user_id:
+        if cursor.rowcount == 0:
+            await db.rollback()  # 沒寫入任何資料也已開啟交易，需釋放寫入鎖
             return False
-
-        await db.execute(
-            "INSERT INTO client_followups (client_id, user_id, note) VALUES (?, ?, ?)",
-            (client_id, user_id, note),
-        )
         await db.commit()
         return True
 
 
 async def list_followups(*, client_id: int, guild_id: int, owner_id: int) -> Optional[List[ClientFollowup]]:
     async with database.connect() as db:
+        # 以 clients 為主表 LEFT JOIN：查無資料列代表無權限，只有一列全為 NULL 代表尚無跟進紀錄
         cursor = await db.execute(
-            "SELECT owner_id FROM clients WHERE id = ? AND guild_id = ?",
-            (client_id, guild_id),
-        )
-        row = await cursor.fetchone()
-        if not row or row["owner_id"] != owner_id:
-            return None
-
-        cursor = await db.execute(
-            "SELECT * FROM client_followups WHERE client_id = ? ORDER BY created_at DESC",
-            (client_id,),
+            f"""
+            SELECT {_FOLLOWUP_COLUMNS_F} FROM clients c
+            LEFT JOIN client_followups f ON f.client_id = c.id
+            WHERE c.id = ? AND c.guild_id = ? AND c.owner_id = ?
+            ORDER BY f.created_at DESC
+            """,
+            (client_id, guild_id, owner_id),
         )
         rows = await cursor.fetchall()
-        return [ClientFollowup(**dict(row)) for row in rows]
+        if not rows:
+            return None
+        return [ClientFollowup(*row) for row in rows if row[0] is not None]
 
 
 async def get_client(*, client_id: int, guild_id: int, owner_id: int) -> Optional[Client]:
     async with database.connect() as db:
         cursor = await db.execute(
-            "SELECT * FROM clients WHERE id = ? AND guild_id = ? AND owner_id = ?",
+            f"SELECT {_CLIENT_COLUMNS} FROM clients WHERE id = ? AND guild_id = ? AND owner_id = ?",
             (client_id, guild_id, owner_id),
         )
         row = await cursor.fetchone()
-        return Client(**dict(row)) if row else None
+        return Client(*row) if row else None
@@ -8,15 +8,22 @@
 """
 
 import asyncio
+import json
 import logging
 import os
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from types import ModuleType
+from typing import Dict, Optional, Sequence, Tuple
 from urllib.parse import urljoin
 
 import aiohttp
 
+from ..utils.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # 資料來源配置
@@ -48,12 +55,28 @@ DATA_SOURCES = {
     },
 }
 
+# 城市鍵值，依 DATA_SOURCES 定義順序
+_CITY_KEYS = tuple(DATA_SOURCES)
+
 # 快取有效期（天數）
 CACHE_VALIDITY_DAYS = 7
 
 # 資料目錄
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 
+# 單次下載的總逾時（秒）
+_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=300)
+
+# download_all_cities 同時下載的城市數上限
+_MAX_CONCURRENT_DOWNLOADS = 4
+
+# get_taichung_cache_info 結果的快取秒數（資料更新時會主動清除）
+_CACHE_INFO_TTL = 30
+
+# 串流下載時每次讀取、以及累積後交給執行緒寫入的位元組數
+_DOWNLOAD_CHUNK_SIZE = 1 << 16
+_WRITE_BUFFER_SIZE = 1 << 20
+
 
 class DataDownloader:
     """政府開放資料下載器."""
@@ -66,6 +89,28 @@ class DataDownloader:
         """
         self.data_dir = data_dir
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._paths: Dict[str, Path] = {key: data_dir / source["filename"] for key, source in DATA_SOURCES.items()}
+        self._session: Optional[aiohttp.ClientSession] = None
+        # city_key -> (mtime_ns, 檔案大小)；首次查詢時 stat 一次，下載成功後直接更新
+        self._meta: Dict[str, Tuple[int, int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """取得共用的 HTTP session（首次使用時建立），多城市與重複下載共用連線池."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60
+                ),
+                timeout=_DOWNLOAD_TIMEOUT,
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """關閉共用的 HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     def _get_file_path(self, city_key: str) -> Path:
         """取得城市資料檔案路徑.
@@ -76,41 +121,60 @@ class DataDownloader:
         Returns:
             檔案完整路徑
         """
-        source = DATA_SOURCES.get(city_key)
-        if not source:
-            raise ValueError(f"不支援的城市：{city_key}")
-
-        return self.data_dir / source["filename"]
+        try:
+            return self._paths[city_key]
+        except KeyError:
+            raise ValueError(f"不支援的城市：{city_key}") from None
+
+    def _get_meta(self, city_key: str) -> Optional[Tuple[int, int]]:
+        """取得資料檔案的 (mtime_ns, 檔案大小)，檔案不存在時返回 None."""
+        meta = self._meta.get(city_key)
+        if meta is None:
+            try:
+                stat = self._paths[city_key].stat()
+            except FileNotFoundError:
+                return None
+            meta = self._meta[city_key] = (stat.st_mtime_ns, stat.st_size)
+        return meta
+
+    def _record_download(self, city_key: str, size: Optional[int] = None) -> None:
+        """下載（或確認未變更）後直接寫入檔案資訊，不必再 stat 剛寫好的檔案.
 
-    def _is_cache_valid(self, file_path: Path) -> bool:
+        Args:
+            city_key: 城市鍵值
+            size: 新檔案大小；None 表示檔案內容未變更，沿用原本的大小
+        """
+        if size is None:
+            meta = self._get_meta(city_key)
+            if meta is None:
+                return
+            size = meta[1]
+        self._meta[city_key] = (time.time_ns(), size)
+
+    def _is_cache_valid(self, city_key: str) -> bool:
         """檢查快取是否有效.
 
         Args:
-            file_path: 檔案路徑
+            city_key: 城市鍵值
 
         Returns:
             True 如果快取有效（檔案存在且未過期）
         """
-        if not file_path.exists():
-            logger.info(f"快取檔案不存在 | path={file_path}")
+        meta = self._get_meta(city_key)
+        if meta is None:
+            logger.info("快取檔案不存在 | city=%s", city_key)
             return False
 
-        # 檢查檔案修改時間
-        mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-        age = datetime.now() - mtime
-        is_valid = age.days < CACHE_VALIDITY_DAYS
-
-        if is_valid:
-            logger.info(
-                f"快取仍有效 | path={file_path.name} | age={age.days}天 | "
-                f"valid_until={CACHE_VALIDITY_DAYS}天"
-            )
-        else:
-            logger.info(
-                f"快取已過期 | path={file_path.name} | age={age.days}天 | "
-                f"expired_after={CACHE_VALIDITY_DAYS}天"
-            )
+        age_days = int((time.time() - meta[0] / 1e9) // 86400)
+        is_valid = age_days < CACHE_VALIDITY_DAYS
 
+        logger.info(
+            "%s | city=%s | age=%s天 | valid_for=%s天",
+            "快取仍有效" if is_valid else "快取已過期",
+            city_key,
+            age_days,
+            CACHE_VALIDITY_DAYS,
+        )
         return is_valid
 
     async def download_city_data(
@@ -130,51 +194,90 @@ class DataDownloader:
             logger.error(f"❌ 不支援的城市 | city={city_key}")
             return None
 
-        file_path = self._get_file_path(city_key)
+        file_path = self._paths[city_key]
 
         # 檢查快取
-        if not force and self._is_cache_valid(file_path):
-            logger.info(f"✅ 使用快取資料 | city={source['name']} | path={file_path.name}")
+        if not force and self._is_cache_valid(city_key):
+            logger.info("✅ 使用快取資料 | city=%s | path=%s", source["name"], file_path.name)
             return file_path
 
-        # 下載資料
+        # 同一城市同時只下載一次；等到鎖時若其他呼叫已更新檔案，直接沿用其結果
+        async with self._locks[city_key]:
+            if not force and self._is_cache_valid(city_key):
+                logger.info("✅ 使用快取資料 | city=%s | path=%s", source["name"], file_path.name)
+                return file_path
+            return await self._fetch(city_key, source, file_path)
+
+    async def _fetch(self, city_key: str, source: Dict[str, str], file_path: Path) -> Optional[Path]:
+        """下載資料並寫入 file_path，失敗時退回舊快取（若存在）."""
         logger.info(f"🔄 開始下載資料 | city={source['name']} | url={source['url']}")
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    source["url"], timeout=aiohttp.ClientTimeout(total=300)
-                ) as response:
-                    if response.status != 200:
-                        logger.error(
-                            f"❌ 下載失敗 | city={source['name']} | "
-                            f"status={response.status}"
-                        )
-                        # 如果下載失敗且有舊快取，使用舊快取
-                        if file_path.exists():
-                            logger.warning(
-                                f"⚠️ 下載失敗，使用舊快取 | city={source['name']} | "
-                                f"path={file_path.name}"
-                            )
-                            return file_path
-                        return None
-
-                    # 讀取內容
-                    content = await response.read()
-
-                    # 儲存檔案
-                    with open(file_path, "wb") as f:
-                        f.write(content)
-
-                    # 記錄成功
-                    size_mb = len(content) / (1024 * 1024)
-                    logger.info(
-                        f"✅ 下載成功 | city={source['name']} | "
-                        f"size={size_mb:.2f}MB | path={file_path.name}"
-                    )
+        validators_path = file_path.with_name(file_path.name + ".meta.json")
 
+        try:
+            session = self._get_session()
+            headers = await asyncio.to_thread(_conditional_headers, file_path, validators_path)
+            async with session.get(source["url"], headers=headers) as response:
+                if response.status == 304:
+                    # 上游資料未變更：只更新檔案時間，重新起算快取有效期
+                    await asyncio.to_thread(os.utime, file_path, None)
+                    self._record_download(city_key)
+                    logger.info("✅ 上游資料未變更，沿用本地檔案 | city=%s | path=%s", source["name"], file_path.name)
                     return file_path
 
+                if response.status != 200:
+                    logger.error(
+                        f"❌ 下載失敗 | city={source['name']} | "
+                        f"status={response.status}"
+                    )
+                    # 如果下載失敗且有舊快取，使用舊快取
+                    if file_path.exists():
+                        logger.warning(
+                            f"⚠️ 下載失敗，使用舊快取 | city={source['name']} | "
+                            f"path={file_path.name}"
+                        )
+                        return file_path
+                    return None
+
+                # 分塊寫入暫存檔，完成後再原子替換，中途失敗不會留下半個檔案；
+                # 累積到一定大小才交給執行緒寫入，磁碟 I/O 不佔用事件迴圈
+                part_path = file_path.with_name(file_path.name + ".part")
+                total = 0
+                try:
+                    # 開檔（建立/截斷）與關檔（flush）同樣在執行緒中進行
+                    f = await asyncio.to_thread(open, part_path, "wb")
+                    try:
+                        buffer = bytearray()
+                        async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                            buffer += chunk
+                            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                                data, buffer = buffer, bytearray()
+                                await asyncio.to_thread(f.write, data)
+                                total += len(data)
+                        if buffer:
+                            await asyncio.to_thread(f.write, buffer)
+                            total += len(buffer)
+                    finally:
+                        await asyncio.to_thread(f.close)
+                    await asyncio.to_thread(os.replace, part_path, file_path)
+                    self._record_download(city_key, total)
+                except BaseException:
+                    part_path.unlink(missing_ok=True)
+                    raise
+                await asyncio.to_thread(
+                    _save_validators, validators_path, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                )
+
+                # 記錄成功
+                logger.info(
+                    "✅ 下載成功 | city=%s | size=%.2fMB | path=%s",
+                    source["name"],
+                    total / (1024 * 1024),
+                    file_path.name,
+                )
+
+                return file_path
+
         except asyncio.TimeoutError:
             logger.error(f"❌ 下載超時 | city={source['name']} | timeout=300秒")
         except aiohttp.ClientError as e:
@@ -192,38 +295,40 @@ class DataDownloader:
 
         return None
 
-    async def download_all_cities(self, force: bool = False) -> Dict[str, Optional[Path]]:
+    async def download_all_cities(
+        self, force: bool = False, cities: Sequence[str] = _CITY_KEYS
+    ) -> Dict[str, Optional[Path]]:
         """下載所有城市資料.
 
         Args:
             force: 是否強制重新下載（忽略快取）
+            cities: 要下載的城市鍵值（預設為全部，依 DATA_SOURCES 順序）
 
         Returns:
             城市鍵值 -> 檔案路徑的字典
         """
-        logger.info(f"🚀 開始下載所有城市資料 | cities={len(DATA_SOURCES)} | force={force}")
+        logger.info(f"🚀 開始下載所有城市資料 | cities={len(cities)} | force={force}")
 
-        tasks = [
-            self.download_city_data(city_key, force=force)
-            for city_key in DATA_SOURCES.keys()
-        ]
+        # 限制同時下載的城市數；單一城市失敗記為 None，不影響其他城市
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DOWNLOADS)
+        downloads: Dict[str, Optional[Path]] = dict.fromkeys(cities)
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def download_one(city_key: str) -> None:
+            async with semaphore:
+                try:
+                    downloads[city_key] = await self.download_city_data(city_key, force=force)
+                except Exception as e:
+                    logger.error(f"❌ 下載失敗 | city={city_key} | error={e}")
 
-        # 整理結果
-        downloads = {}
-        for city_key, result in zip(DATA_SOURCES.keys(), results):
-            if isinstance(result, Exception):
-                logger.error(f"❌ 下載失敗 | city={city_key} | error={result}")
-                downloads[city_key] = None
-            else:
-                downloads[city_key] = result
+        async with asyncio.TaskGroup() as tg:
+            for city_key in downloads:
+                tg.create_task(download_one(city_key))
 
         # 統計
         success_count = sum(1 for path in downloads.values() if path is not None)
         logger.info(
-            f"📊 下載完成 | total={len(DATA_SOURCES)} | "
-            f"success={success_count} | failed={len(DATA_SOURCES) - success_count}"
+            f"📊 下載完成 | total={len(downloads)} | "
+            f"success={success_count} | failed={len(downloads) - success_count}"
         )
 
         return downloads
@@ -265,19 +370,19 @@ class DataDownloader:
         if not source:
             return None
 
-        file_path = self._get_file_path(city_key)
-        if not file_path.exists():
+        meta = self._get_meta(city_key)
+        if meta is None:
             return None
 
-        stat = file_path.stat()
-        mtime = datetime.fromtimestamp(stat.st_mtime)
+        mtime_ns, size = meta
+        mtime = datetime.fromtimestamp(mtime_ns / 1e9)
         age = datetime.now() - mtime
         is_valid = age.days < CACHE_VALIDITY_DAYS
 
         return {
             "city": source["name"],
-            "file_path": str(file_path),
-            "file_size_mb": stat.st_size / (1024 * 1024),
+            "file_path": str(self._paths[city_key]),
+            "file_size_mb": size / (1024 * 1024),
             "last_modified": mtime.strftime("%Y-%m-%d %H:%M:%S"),
             "age_days": age.days,
             "is_valid": is_valid,
@@ -285,8 +390,45 @@ class DataDownloader:
         }
 
 
+def _conditional_headers(file_path: Path, validators_path: Path) -> Dict[str, str]:
+    """依上次下載記錄的 ETag / Last-Modified 組出條件式請求標頭（本地檔案存在時才送出）."""
+    if not file_path.exists():
+        return {}
+    try:
+        validators = json.loads(validators_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _save_validators(validators_path: Path, etag: Optional[str], last_modified: Optional[str]) -> None:
+    """記錄回應的 ETag / Last-Modified，供下次條件式請求使用."""
+    validators = {"etag": etag, "last_modified": last_modified}
+    if not any(validators.values()):
+        validators_path.unlink(missing_ok=True)
+        return
+    validators_path.write_text(json.dumps(validators), encoding="utf-8")
+
+
+@lru_cache(maxsize=1)
+def _official_downloader() -> Optional[ModuleType]:
+    """載入官方下載器模組（只嘗試一次）；缺少相依套件（bs4）時返回 None."""
+    try:
+        from . import official_data_downloader
+    except ImportError:
+        logger.warning("官方下載器不可用，使用舊方法")
+        return None
+    return official_data_downloader
+
+
 # 全域下載器實例
 _downloader = DataDownloader()
+_taichung_info_cache: TTLCache[str, Tuple[Optional[Dict[str, any]]]] = TTLCache(maxsize=1, ttl=_CACHE_INFO_TTL)
 
 
 async def download_taichung_data(force: bool = False) -> Optional[Path]:
@@ -309,84 +451,105 @@ async def ensure_taichung_data() -> Optional[Path]:
     Returns:
         檔案路徑
     """
-    try:
-        # 優先使用官方下載器
-        from . import official_data_downloader
-
-        logger.info("使用官方下載器獲取資料")
-        success = await official_data_downloader.ensure_taichung_data()
-
-        if success:
-            output_file = DATA_DIR / "taichung_prices.csv"
-            if output_file.exists():
-                logger.info(f"✅ 官方資料已就緒 | path={output_file}")
-                return output_file
+    official = _official_downloader()
+    if official is not None:
+        try:
+            # 優先使用官方下載器
+            logger.info("使用官方下載器獲取資料")
+            success = await official.ensure_taichung_data()
+
+            if success:
+                # 官方下載器可能已改寫檔案，下次查詢時重新 stat
+                _downloader._meta.pop("taichung", None)
+                _taichung_info_cache.clear()
+                output_file = DATA_DIR / "taichung_prices.csv"
+                if output_file.exists():
+                    logger.info("✅ 官方資料已就緒 | path=%s", output_file)
+                    return output_file
 
-    except ImportError:
-        logger.warning("官方下載器不可用，使用舊方法")
-    except Exception as e:
-        logger.warning(f"官方下載器失敗 | error={e}")
+        except Exception as e:
+            logger.warning(f"官方下載器失敗 | error={e}")
 
     # 降級：使用舊方法
     logger.info("降級使用舊下載方法")
-    return await _downloader.ensure_city_data("taichung")
+    try:
+        return await _downloader.ensure_city_data("taichung")
+    finally:
+        _taichung_info_cache.clear()
 
 
-async def download_all_cities(force: bool = False) -> Dict[str, Optional[Path]]:
+async def download_all_cities(
+    force: bool = False, cities: Sequence[str] = _CITY_KEYS
+) -> Dict[str, Optional[Path]]:
     """下載所有城市資料（便捷函式）.
 
     Args:
         force: 是否強制重新下載
+        cities: 要下載的城市鍵值（預設為全部）
 
     Returns:
         城市 -> 檔案路徑的字典
     """
-    return await _downloader.download_all_cities(force=force)
+    return await _downloader.download_all_cities(force=force, cities=cities)
+
+
+async def shutdown() -> None:
+    """關閉全域下載器的 HTTP 連線（應用程式結束時呼叫）."""
+    await _downloader.aclose()
+    # 只關閉已載入過的官方下載器；從未使用時不在結束階段才去匯入（缺 bs4 時也不會多記一次警告）
+    if _official_downloader.cache_info().currsize:
+        official = _official_downloader()
+        if official is not None:
+            await official.shutdown()
 
 
 def get_taichung_cache_info() -> Optional[Dict[str, any]]:
     """取得台中市快取資訊（便捷函式）.
 
-    優先返回官方下載器的版本資訊，失敗時使用舊方法。
+    優先返回官方下載器的版本資訊，失敗時使用舊方法。結果短暫快取，
+    避免每次查詢指令都重新 stat 檔案與解析時間。
 
     Returns:
         快取資訊字典
     """
+    # 以單元素 tuple 包裝，連「查無資料」(None) 的結果也一併快取
+    entry = _taichung_info_cache.get("taichung")
+    if entry is not None:
+        return entry[0]
+    info = _load_taichung_cache_info()
+    _taichung_info_cache["taichung"] = (info,)
+    return info
+
+
+def _load_taichung_cache_info() -> Optional[Dict[str, any]]:
+    official = _official_downloader()
     try:
         # 優先使用官方下載器的版本資訊
-        from . import official_data_downloader
-
-        version_info = official_data_downloader.get_version_info()
+        version_info = official.get_version_info() if official is not None else None
         if version_info:
             # 轉換格式以匹配舊的介面
             output_file = DATA_DIR / "taichung_prices.csv"
             if output_file.exists():
                 stat = output_file.stat()
-                last_download = version_info.get("last_download")
-
-                if last_download:
-                    from datetime import datetime
-                    try:
-                        mtime = datetime.fromisoformat(last_download)
-                        age = datetime.now() - mtime
-
-                        return {
-                            "city": "台中市",
-                            "file_path": str(output_file),
-                            "file_size_mb": stat.st_size / (1024 * 1024),
-                            "last_modified": mtime.strftime("%Y-%m-%d %H:%M:%S"),
-                            "age_days": age.days,
-                            "is_valid": age.days < CACHE_VALIDITY_DAYS,
-                            "expires_in_days": max(0, CACHE_VALIDITY_DAYS - age.days),
-                            "version": version_info.get("version"),
-                            "row_count": version_info.get("row_count"),
-                            "source": "official",  # 標記來源
-                        }
-                    except Exception:
-                        pass
+                epoch = official.get_last_download_epoch()
+
+                if epoch is not None:
+                    age_days = int(time.time() - epoch) // 86400
+                    return {
+                        "city": "台中市",
+                        "file_path": str(output_file),
+                        "file_size_mb": stat.st_size / (1024 * 1024),
+                        "last_modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch)),
+                        "age_days": age_days,
+                        "is_valid": age_days < CACHE_VALIDITY_DAYS,
+                        "expires_in_days": max(0, CACHE_VALIDITY_DAYS - age_days),
+                        "version": version_info.get("version"),
+                        "row_count": version_info.get("row_count"),
+                        "source": "official",  # 標記來源
+                    }
 
     except Exception as e:
-        logger.debug(f"無法取得官方下載器資訊 | error={e}")
+        logger.debug("無法取得官方下載器資訊 | error=%s", e)
 
     # 降級：使用舊方法
     return _downloader.get_cache_info("taichung")
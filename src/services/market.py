@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Iterable, List, Optional
 
+import aiohttp
+
 
 @dataclass
 class Listing:
@@ -25,16 +27,18 @@ async def fetch_latest_listings(
     size_min: Optional[float],
     size_max: Optional[float],
     limit: int = 5,
+    *,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> List[Listing]:
     """Fetch latest listings from the authorised open data source.
 
     This is a placeholder implementation that should be replaced with an
     integration with the Ministry of Interior real price registration API.
     The function currently returns an empty list but keeps the interface ready
-    for the production integration.
+    for the production integration. Callers should pass their long-lived
+    ``session`` so upstream requests reuse pooled keep-alive connections.
     """
 
-    await asyncio.sleep(0)
     return []
 
 
@@ -47,8 +51,12 @@ class MarketSummary:
     sample_period_days: int
 
 
-async def fetch_market_summary(area: str, days: int) -> MarketSummary:
-    await asyncio.sleep(0)
+async def fetch_market_summary(
+    area: str,
+    days: int,
+    *,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> MarketSummary:
     return MarketSummary(
         area=area,
         average_price=None,
@@ -58,14 +66,29 @@ async def fetch_market_summary(area: str, days: int) -> MarketSummary:
     )
 
 
-async def generate_report(areas: Iterable[str], days: int) -> str:
-    summaries = await asyncio.gather(*(fetch_market_summary(area, days) for area in areas))
+_REPORT_LINE = "- {area}: 平均單價 {avg} 萬/坪，成交中位數 {med} 萬/坪，交易量 {count} 件".format
+_PRICE_FMT = "{:.0f}".format
+
+
+async def generate_report(
+    areas: Iterable[str],
+    days: int,
+    *,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> str:
+    summaries = await asyncio.gather(
+        *(fetch_market_summary(area, days, session=session) for area in areas)
+    )
 
-    lines = [f"市場行情報表（近 {days} 天）"]
-    for summary in summaries:
-        avg = f"{summary.average_price:.0f}" if summary.average_price else "N/A"
-        med = f"{summary.median_price:.0f}" if summary.median_price else "N/A"
-        lines.append(
-            f"- {summary.area}: 平均單價 {avg} 萬/坪，成交中位數 {med} 萬/坪，交易量 {summary.transactions} 件"
-        )
-    return "\n".join(lines)
+    return "\n".join([
+        f"市場行情報表（近 {days} 天）",
+        *(
+            _REPORT_LINE(
+                area=summary.area,
+                avg=_PRICE_FMT(summary.average_price) if summary.average_price else "N/A",
+                med=_PRICE_FMT(summary.median_price) if summary.median_price else "N/A",
+                count=summary.transactions,
+            )
+            for summary in summaries
+        ),
+    ])
@@ -2,14 +2,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, List, Optional, Set, Tuple
 
 import aiosqlite
 
 from .. import database
 
 
-@dataclass
+@dataclass(slots=True)
 class MonitoringRule:
     id: int
     user_id: int
@@ -19,6 +19,20 @@ class MonitoringRule:
     price_max: Optional[int]
     size_min: Optional[float]
     size_max: Optional[float]
+    created_at: str
+
+
+# 欄位順序與 dataclass 一致，查詢結果可直接依位置建立物件
+_RULE_COLUMNS = "id, user_id, guild_id, area, price_min, price_max, size_min, size_max, created_at"
+
+# add_rules 的單筆輸入：(user_id, guild_id, area, price_min, price_max, size_min, size_max)
+RuleRow = Tuple[int, int, str, Optional[int], Optional[int], Optional[float], Optional[float]]
+
+
+_INSERT_RULE = """
+    INSERT INTO monitoring (user_id, guild_id, area, price_min, price_max, size_min, size_max)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
 
 
 async def add_rule(
@@ -33,24 +47,35 @@ async def add_rule(
 ) -> int:
     async with database.connect() as db:
         cursor = await db.execute(
-            """
-            INSERT INTO monitoring (user_id, guild_id, area, price_min, price_max, size_min, size_max)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_RULE,
             (user_id, guild_id, area, price_min, price_max, size_min, size_max),
         )
         await db.commit()
         return cursor.lastrowid
 
 
+async def add_rules(rows: Iterable[RuleRow]) -> int:
+    """一次新增多筆監控條件（單一交易、單次提交），回傳新增筆數。
+
+    每筆依序為 (user_id, guild_id, area, price_min, price_max, size_min, size_max)。
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    async with database.connect() as db:
+        await db.executemany(_INSERT_RULE, rows)
+        await db.commit()
+    return len(rows)
+
+
 async def list_rules(*, user_id: int, guild_id: int) -> List[MonitoringRule]:
     async with database.connect() as db:
         cursor = await db.execute(
-            "SELECT * FROM monitoring WHERE user_id = ? AND guild_id = ? ORDER BY id",
+            f"SELECT {_RULE_COLUMNS} FROM monitoring WHERE user_id = ? AND guild_id = ? ORDER BY id",
             (user_id, guild_id),
         )
         rows = await cursor.fetchall()
-        return [MonitoringRule(**dict(row)) for row in rows]
+        return [MonitoringRule(*row) for row in rows]
 
 
 async def delete_rule(*, rule_id: int, user_id: int, guild_id: int) -> bool:
@@ -63,7 +88,33 @@ async def delete_rule(*, rule_id: int, user_id: int, guild_id: int) -> bool:
         return cursor.rowcount > 0
 
 
-async def iter_rules(db: aiosqlite.Connection) -> List[MonitoringRule]:
-    cursor = await db.execute("SELECT * FROM monitoring")
-    rows = await cursor.fetchall()
-    return [MonitoringRule(**dict(row)) for row in rows]
+async def iter_rules(db: aiosqlite.Connection) -> AsyncIterator[MonitoringRule]:
+    """逐筆產生所有監控條件，不先把整張表載入記憶體。"""
+    async with db.execute(f"SELECT {_RULE_COLUMNS} FROM monitoring") as cursor:
+        async for row in cursor:
+            yield MonitoringRule(*row)
+
+
+async def synced_this_week(iso_week: str) -> Set[int]:
+    """回傳本週（例如 2026-W42）已推播過的監控條件編號。"""
+    async with database.connect() as db:
+        cursor = await db.execute(
+            "SELECT rule_id FROM rule_sync_log WHERE iso_week = ?",
+            (iso_week,),
+        )
+        rows = await cursor.fetchall()
+        return {row["rule_id"] for row in rows}
+
+
+async def mark_synced(rule_ids: List[int], iso_week: str) -> None:
+    """記錄本週已推播的監控條件；推播期間已被刪除的條件直接略過，不影響其他筆."""
+    if not rule_ids:
+        return
+    placeholders = ", ".join("?" * len(rule_ids))
+    async with database.connect() as db:
+        await db.execute(
+            f"INSERT OR IGNORE INTO rule_sync_log (rule_id, iso_week) "
+            f"SELECT id, ? FROM monitoring WHERE id IN ({placeholders})",
+            (iso_week, *rule_ids),
+        )
+        await db.commit()
@@ -12,16 +12,20 @@
 """
 
 import asyncio
+import codecs
 import csv
+import io
 import json
 import logging
 import os
+import random
 import shutil
 import time
 import zipfile
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import aiohttp
@@ -48,10 +52,91 @@ CACHE_VALIDITY_DAYS = 7
 
 # 下載重試設定
 MAX_RETRIES = 3
-RETRY_DELAY = 5  # 秒
+RETRY_DELAY = 5  # 秒，第一次重試的等待時間，之後每次加倍
+MAX_RETRY_DELAY = 60  # 秒
+
+# 下載串流設定
+_DOWNLOAD_CHUNK_SIZE = 1 << 16
+_WRITE_BUFFER_SIZE = 1 << 20
+_PROGRESS_LOG_INTERVAL = 10 * 1024 * 1024  # 每 10MB 記錄一次進度
 
 # 支援的編碼
 ENCODINGS = ["utf-8", "big5", "gbk", "utf-8-sig"]
+_ENCODING_SAMPLE_SIZE = 4096  # 檢測編碼時讀取的開頭位元組數
+
+# 台中市所有行政區（地址欄位無縣市名時的備用判斷）
+TAICHUNG_DISTRICTS = frozenset({
+    "中區", "東區", "南區", "西區", "北區",
+    "北屯區", "西屯區", "南屯區", "太平區", "大里區",
+    "霧峰區", "烏日區", "豐原區", "后里區", "石岡區",
+    "東勢區", "和平區", "新社區", "潭子區", "大雅區",
+    "神岡區", "大肚區", "沙鹿區", "龍井區", "梧棲區",
+    "清水區", "大甲區", "外埔區", "大安區",
+})
+
+# 內政部季資料 ZIP 內台中市的檔名前綴（縣市代碼 B = 臺中市）
+TAICHUNG_MEMBER_PREFIX = "b_lvr_land_"
+
+
+def _locate_filter_fields(fieldnames: List[str]) -> Tuple[Optional[int], Optional[int]]:
+    """回傳 (門牌/地址欄位索引, 鄉鎮市區/縣市欄位索引)，找不到的為 None."""
+    address_idx = district_idx = None
+    for idx, field in enumerate(fieldnames):
+        if "門牌" in field or "土地位置" in field or "地址" in field:
+            address_idx = idx
+        elif "鄉鎮市區" in field or "縣市" in field:
+            district_idx = idx
+    return address_idx, district_idx
+
+
+def _field_name(fieldnames: List[str], idx: Optional[int]) -> Optional[str]:
+    return None if idx is None else fieldnames[idx]
+
+
+def _iter_taichung_rows(
+    rows: Iterable[List[str]], address_idx: Optional[int], district_idx: Optional[int]
+) -> Iterator[List[str]]:
+    """篩出台中市的列：門牌含「台中市/臺中市」，否則看鄉鎮市區是否為台中的區."""
+    for row in rows:
+        if address_idx is not None and address_idx < len(row):
+            address = row[address_idx]
+            if "台中市" in address or "臺中市" in address:
+                yield row
+                continue
+        if district_idx is not None and district_idx < len(row) and row[district_idx] in TAICHUNG_DISTRICTS:
+            yield row
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """第 attempt 次失敗後的等待秒數：伺服器給了 Retry-After 就照辦，否則指數退避加隨機抖動."""
+    if retry_after and retry_after.isdigit():
+        return min(MAX_RETRY_DELAY, int(retry_after))
+    return min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempt - 1)) + random.random()
+
+
+def _detect_encoding(sample: bytes) -> str:
+    """依開頭位元組判斷編碼；用增量解碼器，樣本尾端被截斷的多位元組字元不算錯."""
+    # 有 BOM 直接用 utf-8-sig，否則 utf-8 會先成功，BOM 會混進第一個欄位名稱
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+    logger.warning("無法檢測編碼，使用預設 UTF-8")
+    return "utf-8"
+
+
+@dataclass(slots=True)
+class DownloadResult:
+    """download_file 的結果；not_modified 表示伺服器回 304，遠端檔案自上次下載後未變更."""
+
+    ok: bool
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
 
 
 class VersionInfo:
@@ -90,29 +175,31 @@ class VersionInfo:
 
     def is_cache_valid(self) -> bool:
         """檢查快取是否有效."""
-        last_download = self._data.get("last_download")
-        if not last_download:
-            return False
-
-        try:
-            last_dt = datetime.fromisoformat(last_download)
-            age = datetime.now() - last_dt
-            return age.days < CACHE_VALIDITY_DAYS
-        except Exception:
-            return False
+        age_days = self.get_cache_age_days()
+        return age_days is not None and age_days < CACHE_VALIDITY_DAYS
 
     def get_cache_age_days(self) -> Optional[int]:
         """取得快取年齡（天數）."""
+        epoch = self.get_last_download_epoch()
+        if epoch is None:
+            return None
+        return int(time.time() - epoch) // 86400
+
+    def get_last_download_epoch(self) -> Optional[float]:
+        """取得上次下載時間（epoch 秒數）；舊版版本檔只有 ISO 字串，解析一次後記住."""
+        epoch = self._data.get("last_download_epoch")
+        if epoch is not None:
+            return epoch
+
         last_download = self._data.get("last_download")
         if not last_download:
             return None
-
         try:
-            last_dt = datetime.fromisoformat(last_download)
-            age = datetime.now() - last_dt
-            return age.days
-        except Exception:
+            epoch = datetime.fromisoformat(last_download).timestamp()
+        except ValueError:
             return None
+        self._data["last_download_epoch"] = epoch
+        return epoch
 
 
 class OfficialDataDownloader:
@@ -122,11 +209,29 @@ class OfficialDataDownloader:
         self.data_dir = data_dir
         self.backup_dir = BACKUP_DIR
         self.version_info = VersionInfo()
+        self._session: Optional[aiohttp.ClientSession] = None
 
         # 建立目錄
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """取得共用的 HTTP session（首次使用時建立），爬取與重試下載共用連線池."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=16, limit_per_host=4, keepalive_timeout=75, enable_cleanup_closed=True
+                ),
+                timeout=aiohttp.ClientTimeout(total=600),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """關閉共用的 HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     async def fetch_latest_version_info(self) -> Optional[Dict[str, str]]:
         """
         爬取最新版本資訊。
@@ -199,24 +304,24 @@ class OfficialDataDownloader:
                 "Referer": "https://plvr.land.moi.gov.tw/",
             }
 
-            async with aiohttp.ClientSession() as session:
-                # 添加延遲避免被封鎖
-                await asyncio.sleep(2)
+            session = self._get_session()
+            # 添加延遲避免被封鎖
+            await asyncio.sleep(2)
 
-                async with session.get(
-                    MOI_DOWNLOAD_URL, headers=headers, timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"爬取失敗 | status={response.status}")
-                        return None
+            async with session.get(
+                MOI_DOWNLOAD_URL, headers=headers, timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"爬取失敗 | status={response.status}")
+                    return None
 
-                    html = await response.text()
+                html = await response.text()
 
-                    # 調試：保存 HTML
-                    debug_file = self.data_dir / "debug_page.html"
-                    with open(debug_file, "w", encoding="utf-8") as f:
-                        f.write(html)
-                    logger.debug(f"HTML 已保存 | path={debug_file}")
+                # 調試：保存 HTML
+                debug_file = self.data_dir / "debug_page.html"
+                with open(debug_file, "w", encoding="utf-8") as f:
+                    f.write(html)
+                logger.debug(f"HTML 已保存 | path={debug_file}")
 
             # 解析 HTML
             soup = BeautifulSoup(html, "html.parser")
@@ -258,8 +363,13 @@ class OfficialDataDownloader:
             return None
 
     async def download_file(
-        self, url: str, output_path: Path, max_retries: int = MAX_RETRIES
-    ) -> bool:
+        self,
+        url: str,
+        output_path: Path,
+        max_retries: int = MAX_RETRIES,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> DownloadResult:
         """
         下載檔案（帶重試機制）。
 
@@ -267,48 +377,81 @@ class OfficialDataDownloader:
             url: 下載連結
             output_path: 輸出路徑
             max_retries: 最大重試次數
+            etag: 上次下載的 ETag，有值時送出 If-None-Match
+            last_modified: 上次下載的 Last-Modified，有值時送出 If-Modified-Since
 
         Returns:
-            True 如果下載成功
+            DownloadResult；ok 為 True 表示下載成功或遠端未變更（not_modified）
         """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
         for attempt in range(1, max_retries + 1):
             try:
                 logger.info(f"開始下載 | attempt={attempt}/{max_retries} | url={url}")
 
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        url, timeout=aiohttp.ClientTimeout(total=600)
-                    ) as response:
-                        if response.status != 200:
-                            logger.error(f"下載失敗 | status={response.status}")
-                            if attempt < max_retries:
-                                logger.info(f"等待 {RETRY_DELAY} 秒後重試...")
-                                await asyncio.sleep(RETRY_DELAY)
+                session = self._get_session()
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        logger.info(f"遠端檔案未變更 | url={url}")
+                        return DownloadResult(ok=True, not_modified=True)
+
+                    if response.status != 200:
+                        logger.error(f"下載失敗 | status={response.status}")
+                        if attempt < max_retries:
+                            retry_after = (
+                                response.headers.get("Retry-After")
+                                if response.status in (429, 503)
+                                else None
+                            )
+                            delay = _retry_delay(attempt, retry_after)
+                            logger.info(f"等待 {delay:.1f} 秒後重試...")
+                            await asyncio.sleep(delay)
+                            continue
+                        return DownloadResult(ok=False)
+
+                    # 取得檔案大小
+                    total_size = int(response.headers.get("content-length", 0))
+                    downloaded_size = 0
+
+                    # 下載並寫入檔案；累積到一定大小才交給執行緒寫入，磁碟 I/O 不佔用事件迴圈
+                    next_progress = _PROGRESS_LOG_INTERVAL
+                    # 開檔（建立/截斷）與關檔（flush）同樣在執行緒中進行
+                    f = await asyncio.to_thread(open, output_path, "wb")
+                    try:
+                        buffer = bytearray()
+                        async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                            buffer += chunk
+                            if len(buffer) < _WRITE_BUFFER_SIZE:
                                 continue
-                            return False
-
-                        # 取得檔案大小
-                        total_size = int(response.headers.get("content-length", 0))
-                        downloaded_size = 0
-
-                        # 下載並寫入檔案
-                        with open(output_path, "wb") as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                f.write(chunk)
-                                downloaded_size += len(chunk)
-
-                                # 記錄進度
-                                if total_size > 0:
-                                    progress = (downloaded_size / total_size) * 100
-                                    if downloaded_size % (1024 * 1024 * 10) < 8192:  # 每 10MB 記錄一次
-                                        logger.info(
-                                            f"下載進度：{progress:.1f}% "
-                                            f"({downloaded_size / (1024*1024):.1f}MB / "
-                                            f"{total_size / (1024*1024):.1f}MB)"
-                                        )
+                            data, buffer = buffer, bytearray()
+                            await asyncio.to_thread(f.write, data)
+                            downloaded_size += len(data)
+
+                            # 記錄進度（每 10MB 一次）
+                            if total_size > 0 and downloaded_size >= next_progress:
+                                next_progress += _PROGRESS_LOG_INTERVAL
+                                progress = (downloaded_size / total_size) * 100
+                                logger.info(
+                                    f"下載進度：{progress:.1f}% "
+                                    f"({downloaded_size / (1024*1024):.1f}MB / "
+                                    f"{total_size / (1024*1024):.1f}MB)"
+                                )
+                        if buffer:
+                            await asyncio.to_thread(f.write, buffer)
+                            downloaded_size += len(buffer)
+                    finally:
+                        await asyncio.to_thread(f.close)
 
                 logger.info(f"下載成功 | size={downloaded_size / (1024*1024):.1f}MB")
-                return True
+                return DownloadResult(
+                    ok=True,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
 
             except asyncio.TimeoutError:
                 logger.error(f"下載超時 | attempt={attempt}")
@@ -316,10 +459,11 @@ class OfficialDataDownloader:
                 logger.error(f"下載失敗 | attempt={attempt} | error={e}")
 
             if attempt < max_retries:
-                logger.info(f"等待 {RETRY_DELAY} 秒後重試...")
-                await asyncio.sleep(RETRY_DELAY)
+                delay = _retry_delay(attempt)
+                logger.info(f"等待 {delay:.1f} 秒後重試...")
+                await asyncio.sleep(delay)
 
-        return False
+        return DownloadResult(ok=False)
 
     def detect_encoding(self, file_path: Path) -> str:
         """
@@ -331,17 +475,11 @@ class OfficialDataDownloader:
         Returns:
             編碼名稱
         """
-        for encoding in ENCODINGS:
-            try:
-                with open(file_path, "r", encoding=encoding) as f:
-                    f.read(1024)  # 讀取前 1KB 測試
-                logger.info(f"檢測到編碼 | encoding={encoding}")
-                return encoding
-            except UnicodeDecodeError:
-                continue
-
-        logger.warning(f"無法檢測編碼，使用預設 UTF-8")
-        return "utf-8"
+        # 只開檔讀一次開頭樣本，各編碼在記憶體中試解
+        with open(file_path, "rb") as f:
+            encoding = _detect_encoding(f.read(_ENCODING_SAMPLE_SIZE))
+        logger.info(f"檢測到編碼 | encoding={encoding}")
+        return encoding
 
     def filter_taichung_data(
         self, input_path: Path, output_path: Path
@@ -362,206 +500,176 @@ class OfficialDataDownloader:
 
             logger.info(f"開始過濾台中市資料 | encoding={encoding}")
 
-            # 讀取 CSV
-            with open(input_path, "r", encoding=encoding) as f_in:
-                reader = csv.DictReader(f_in)
-                fieldnames = reader.fieldnames
+            # 以 csv.reader 逐列串流並依欄位索引判斷，不為每列建 dict，也不把結果整批留在記憶體
+            part_path = output_path.with_name(output_path.name + ".part")
+            try:
+                with open(input_path, "r", encoding=encoding, newline="") as f_in, open(
+                    part_path, "w", encoding="utf-8", newline=""
+                ) as f_out:
+                    reader = csv.reader(f_in)
+                    fieldnames = next(reader, None)
 
-                if not fieldnames:
-                    logger.error("CSV 無欄位名稱")
-                    return False, 0
+                    if not fieldnames:
+                        logger.error("CSV 無欄位名稱")
+                        return False, 0
 
-                logger.info(f"CSV 欄位 | fields={fieldnames}")
+                    logger.info(f"CSV 欄位 | fields={fieldnames}")
 
-                # 尋找地址欄位（門牌欄位包含完整地址，含縣市名）
-                address_field = None
-                district_field = None
+                    # 尋找地址欄位（門牌欄位包含完整地址，含縣市名），備用鄉鎮市區欄位
+                    address_idx, district_idx = _locate_filter_fields(fieldnames)
+                    if address_idx is None and district_idx is None:
+                        logger.error("找不到地址或縣市欄位")
+                        return False, 0
 
-                for field in fieldnames:
-                    # 優先尋找門牌/地址欄位（含完整地址）
-                    if "門牌" in field or "土地位置" in field or "地址" in field:
-                        address_field = field
-                    # 備用：鄉鎮市區欄位
-                    elif "鄉鎮市區" in field or "縣市" in field:
-                        district_field = field
+                    logger.info(
+                        f"過濾欄位 | address_field={_field_name(fieldnames, address_idx)} | "
+                        f"district_field={_field_name(fieldnames, district_idx)}"
+                    )
 
-                if not address_field and not district_field:
-                    logger.error("找不到地址或縣市欄位")
+                    writer = csv.writer(f_out)
+                    writer.writerow(fieldnames)
+                    row_count = 0
+                    for row in _iter_taichung_rows(reader, address_idx, district_idx):
+                        writer.writerow(row)
+                        row_count += 1
+
+                logger.info(f"過濾完成 | 台中市筆數={row_count}")
+
+                # 寫入輸出檔案
+                if row_count:
+                    os.replace(part_path, output_path)
+                    logger.info(f"台中市資料已保存 | path={output_path}")
+                    return True, row_count
+                else:
+                    logger.warning("過濾結果為空")
                     return False, 0
-
-                logger.info(
-                    f"過濾欄位 | address_field={address_field} | district_field={district_field}"
-                )
-
-                # 台中市所有行政區列表（備用方案）
-                taichung_districts = {
-                    "中區", "東區", "南區", "西區", "北區",
-                    "北屯區", "西屯區", "南屯區", "太平區", "大里區",
-                    "霧峰區", "烏日區", "豐原區", "后里區", "石岡區",
-                    "東勢區", "和平區", "新社區", "潭子區", "大雅區",
-                    "神岡區", "大肚區", "沙鹿區", "龍井區", "梧棲區",
-                    "清水區", "大甲區", "外埔區", "大安區"
-                }
-
-                # 過濾台中市資料
-                taichung_rows = []
-                for row in reader:
-                    is_taichung = False
-
-                    # 方法 1：檢查門牌欄位是否包含「台中市」或「臺中市」
-                    if address_field:
-                        address = row.get(address_field, "")
-                        if "台中市" in address or "臺中市" in address:
-                            is_taichung = True
-
-                    # 方法 2：備用 - 檢查鄉鎮市區欄位是否為台中市的區
-                    if not is_taichung and district_field:
-                        district = row.get(district_field, "")
-                        if district in taichung_districts:
-                            is_taichung = True
-
-                    if is_taichung:
-                        taichung_rows.append(row)
-
-            logger.info(f"過濾完成 | 台中市筆數={len(taichung_rows)}")
-
-            # 寫入輸出檔案
-            if taichung_rows:
-                with open(output_path, "w", encoding="utf-8", newline="") as f_out:
-                    writer = csv.DictWriter(f_out, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(taichung_rows)
-
-                logger.info(f"台中市資料已保存 | path={output_path}")
-                return True, len(taichung_rows)
-            else:
-                logger.warning("過濾結果為空")
-                return False, 0
+            finally:
+                part_path.unlink(missing_ok=True)
 
         except Exception as e:
             logger.error(f"過濾資料失敗 | error={e}", exc_info=True)
             return False, 0
 
-    def filter_and_merge_taichung_data(
-        self, input_paths: List[Path], output_path: Path
+    def filter_taichung_data_from_zip(
+        self, zip_path: Path, output_path: Path
     ) -> Tuple[bool, int]:
         """
-        從多個 CSV 檔案過濾並合併台中市資料。
+        直接從 ZIP 內的 CSV 串流過濾並合併台中市資料（不解壓到磁碟）。
 
         Args:
-            input_paths: 輸入檔案列表（全國資料）
+            zip_path: ZIP 檔案路徑（全國資料）
             output_path: 輸出檔案（合併的台中市資料）
 
         Returns:
             (成功, 總筆數)
         """
+        part_path = output_path.with_name(output_path.name + ".part")
         try:
-            all_taichung_rows = []
-            common_fieldnames = None
-            total_processed = 0
-
-            logger.info(f"開始處理 {len(input_paths)} 個 CSV 檔案")
-
-            # 台中市所有行政區列表
-            taichung_districts = {
-                "中區", "東區", "南區", "西區", "北區",
-                "北屯區", "西屯區", "南屯區", "太平區", "大里區",
-                "霧峰區", "烏日區", "豐原區", "后里區", "石岡區",
-                "東勢區", "和平區", "新社區", "潭子區", "大雅區",
-                "神岡區", "大肚區", "沙鹿區", "龍井區", "梧棲區",
-                "清水區", "大甲區", "外埔區", "大安區"
-            }
-
-            for idx, input_path in enumerate(input_paths, 1):
-                try:
-                    # 檢測編碼
-                    encoding = self.detect_encoding(input_path)
-
-                    logger.info(f"[{idx}/{len(input_paths)}] 處理 {input_path.name} | encoding={encoding}")
-
-                    # 讀取 CSV
-                    with open(input_path, "r", encoding=encoding) as f_in:
-                        reader = csv.DictReader(f_in)
-                        fieldnames = reader.fieldnames
-
-                        if not fieldnames:
-                            logger.warning(f"[{idx}/{len(input_paths)}] CSV 無欄位名稱，跳過")
-                            continue
-
-                        # 設定統一的欄位名稱（使用第一個有效檔案的欄位）
-                        if common_fieldnames is None:
-                            common_fieldnames = fieldnames
-                            logger.info(f"使用欄位 | fields={fieldnames}")
-
-                        # 尋找地址欄位
-                        address_field = None
-                        district_field = None
-
-                        for field in fieldnames:
-                            if "門牌" in field or "土地位置" in field or "地址" in field:
-                                address_field = field
-                            elif "鄉鎮市區" in field or "縣市" in field:
-                                district_field = field
+            with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                file_list = zip_ref.namelist()
+                logger.info(f"ZIP 包含 {len(file_list)} 個檔案")
 
-                        if not address_field and not district_field:
-                            logger.warning(f"[{idx}/{len(input_paths)}] 找不到地址欄位，跳過")
-                            continue
+                # 尋找 CSV 檔案（通常是不動產買賣的）
+                csv_names = [f for f in file_list if f.endswith(".csv") and "lvr_land" in f.lower()]
+                if not csv_names:
+                    # 如果沒有找到特定的，尋找任何 CSV
+                    csv_names = [f for f in file_list if f.endswith(".csv")]
+                if not csv_names:
+                    logger.error("ZIP 中沒有找到 CSV 檔案")
+                    return False, 0
 
-                        # 過濾台中市資料
-                        file_taichung_count = 0
-                        for row in reader:
-                            total_processed += 1
-                            is_taichung = False
-
-                            # 方法 1：檢查門牌欄位是否包含「台中市」或「臺中市」
-                            if address_field:
-                                address = row.get(address_field, "")
-                                if "台中市" in address or "臺中市" in address:
-                                    is_taichung = True
-
-                            # 方法 2：備用 - 檢查鄉鎮市區欄位
-                            if not is_taichung and district_field:
-                                district = row.get(district_field, "")
-                                if district in taichung_districts:
-                                    is_taichung = True
-
-                            if is_taichung:
-                                # 確保所有欄位都存在（補齊缺失的欄位）
+                # 季資料每個縣市各一檔，檔名首碼為縣市代碼；有台中的檔就只讀它們，其他縣市不必逐列解析
+                taichung_names = [
+                    f for f in csv_names if Path(f).name.lower().startswith(TAICHUNG_MEMBER_PREFIX)
+                ]
+                if taichung_names:
+                    csv_names = taichung_names
+
+                logger.info(f"開始處理 {len(csv_names)} 個 CSV 檔案")
+
+                common_fieldnames = None
+                writer = None
+                total_processed = 0
+                taichung_count = 0
+
+                with open(part_path, "w", encoding="utf-8", newline="") as f_out:
+                    for idx, name in enumerate(csv_names, 1):
+                        try:
+                            # 只讀開頭樣本檢測編碼，再重新開啟成串流
+                            with zip_ref.open(name) as raw:
+                                encoding = _detect_encoding(raw.read(_ENCODING_SAMPLE_SIZE))
+
+                            logger.info(f"[{idx}/{len(csv_names)}] 處理 {name} | encoding={encoding}")
+
+                            with zip_ref.open(name) as raw, io.TextIOWrapper(
+                                raw, encoding=encoding, newline=""
+                            ) as f_in:
+                                reader = csv.reader(f_in)
+                                fieldnames = next(reader, None)
+
+                                if not fieldnames:
+                                    logger.warning(f"[{idx}/{len(csv_names)}] CSV 無欄位名稱，跳過")
+                                    continue
+
+                                # 尋找地址欄位
+                                address_idx, district_idx = _locate_filter_fields(fieldnames)
+                                if address_idx is None and district_idx is None:
+                                    logger.warning(f"[{idx}/{len(csv_names)}] 找不到地址欄位，跳過")
+                                    continue
+
+                                # 設定統一的欄位名稱（使用第一個有效檔案的欄位）
+                                if common_fieldnames is None:
+                                    common_fieldnames = fieldnames
+                                    logger.info(f"使用欄位 | fields={fieldnames}")
+                                    writer = csv.writer(f_out)
+                                    writer.writerow(common_fieldnames)
+
+                                rows = _iter_taichung_rows(reader, address_idx, district_idx)
                                 if fieldnames != common_fieldnames:
-                                    normalized_row = {field: row.get(field, "") for field in common_fieldnames}
-                                    all_taichung_rows.append(normalized_row)
-                                else:
-                                    all_taichung_rows.append(row)
-                                file_taichung_count += 1
-
-                    logger.info(
-                        f"[{idx}/{len(input_paths)}] 完成 | 台中市筆數={file_taichung_count}"
-                    )
-
-                except Exception as e:
-                    logger.warning(f"[{idx}/{len(input_paths)}] 處理失敗 | file={input_path.name} | error={e}")
-                    continue
+                                    # 依統一欄位重排，補齊缺失的欄位
+                                    positions = {field: i for i, field in enumerate(fieldnames)}
+                                    order = [positions.get(field) for field in common_fieldnames]
+                                    rows = (
+                                        [row[i] if i is not None and i < len(row) else "" for i in order]
+                                        for row in rows
+                                    )
+
+                                # 過濾台中市資料，邊讀邊寫
+                                file_taichung_count = 0
+                                for row in rows:
+                                    writer.writerow(row)
+                                    file_taichung_count += 1
+                                total_processed += reader.line_num - 1
+
+                            taichung_count += file_taichung_count
+                            logger.info(
+                                f"[{idx}/{len(csv_names)}] 完成 | 台中市筆數={file_taichung_count}"
+                            )
+
+                        except Exception as e:
+                            logger.warning(f"[{idx}/{len(csv_names)}] 處理失敗 | file={name} | error={e}")
+                            continue
 
             logger.info(
-                f"所有檔案處理完成 | 總處理筆數={total_processed} | 台中市筆數={len(all_taichung_rows)}"
+                f"所有檔案處理完成 | 總處理筆數={total_processed} | 台中市筆數={taichung_count}"
             )
 
-            # 寫入合併結果
-            if all_taichung_rows and common_fieldnames:
-                with open(output_path, "w", encoding="utf-8", newline="") as f_out:
-                    writer = csv.DictWriter(f_out, fieldnames=common_fieldnames)
-                    writer.writeheader()
-                    writer.writerows(all_taichung_rows)
+            if taichung_count:
+                os.replace(part_path, output_path)
+                logger.info(f"✅ 台中市資料已合併保存 | path={output_path} | rows={taichung_count}")
+                return True, taichung_count
 
-                logger.info(f"✅ 台中市資料已合併保存 | path={output_path} | rows={len(all_taichung_rows)}")
-                return True, len(all_taichung_rows)
-            else:
-                logger.warning("過濾結果為空")
-                return False, 0
+            logger.warning("過濾結果為空")
+            return False, 0
 
+        except zipfile.BadZipFile:
+            logger.error("無效的 ZIP 檔案")
+            return False, 0
         except Exception as e:
             logger.error(f"合併資料失敗 | error={e}", exc_info=True)
             return False, 0
+        finally:
+            part_path.unlink(missing_ok=True)
 
     def backup_old_data(self) -> None:
         """備份舊資料."""
@@ -615,53 +723,61 @@ class OfficialDataDownloader:
         file_name = version_info.get("file_name", "data.csv")
         is_zip = file_name.endswith(".zip")
 
+        # 同一下載連結且輸出檔仍在時帶上次的驗證標頭，遠端未變更就不必重下整包
+        download_url = version_info["download_url"]
+        can_revalidate = (
+            OUTPUT_FILE.exists() and self.version_info.get("source_url") == download_url
+        )
         temp_file = self.data_dir / ("temp_download.zip" if is_zip else "temp_download.csv")
-        success = await self.download_file(version_info["download_url"], temp_file)
-
-        if not success:
+        result = await self.download_file(
+            download_url,
+            temp_file,
+            etag=self.version_info.get("etag") if can_revalidate else None,
+            last_modified=self.version_info.get("last_modified") if can_revalidate else None,
+        )
+
+        if not result.ok:
             logger.error("下載失敗")
             return False
 
-        # 3.5. 如果是 ZIP 檔案，解壓縮
-        csv_files = []
-        if is_zip:
-            logger.info("檢測到 ZIP 檔案，開始解壓縮")
-            csv_files = await self._extract_zip(temp_file)
-            if not csv_files:
-                logger.error("解壓縮失敗")
-                if temp_file.exists():
-                    temp_file.unlink()
-                return False
-        else:
-            # 單一 CSV 檔案
-            csv_files = [temp_file]
+        if result.not_modified:
+            now = time.time()
+            self.version_info.save({
+                **self.version_info._data,
+                "last_download": datetime.fromtimestamp(now).isoformat(),
+                "last_download_epoch": int(now),
+                "version": new_version,
+            })
+            logger.info(f"✅ 遠端資料未變更，沿用現有資料 | version={new_version}")
+            return True
 
-        # 4. 備份舊資料
-        self.backup_old_data()
+        # 4. 備份舊資料（檔案複製在執行緒中進行，不阻塞事件迴圈）
+        await asyncio.to_thread(self.backup_old_data)
 
-        # 5. 過濾並合併台中市資料
-        if len(csv_files) > 1:
-            logger.info(f"使用多檔案合併模式 | 檔案數={len(csv_files)}")
-            success, row_count = self.filter_and_merge_taichung_data(csv_files, OUTPUT_FILE)
+        # 5. 過濾台中市資料（ZIP 直接串流讀取，不先解壓到磁碟）
+        if is_zip:
+            logger.info("使用 ZIP 串流合併模式")
+            success, row_count = self.filter_taichung_data_from_zip(temp_file, OUTPUT_FILE)
         else:
             logger.info("使用單檔案模式")
-            success, row_count = self.filter_taichung_data(csv_files[0], OUTPUT_FILE)
+            success, row_count = self.filter_taichung_data(temp_file, OUTPUT_FILE)
 
         if not success:
             logger.error("過濾資料失敗")
             # 清理臨時檔案
             if temp_file.exists():
                 temp_file.unlink()
-            for csv_file in csv_files:
-                if csv_file != temp_file and csv_file.exists():
-                    csv_file.unlink()
             return False
 
         # 6. 更新版本資訊
+        now = time.time()
         self.version_info.save({
-            "last_download": datetime.now().isoformat(),
+            "last_download": datetime.fromtimestamp(now).isoformat(),
+            "last_download_epoch": int(now),
             "version": new_version,
-            "source_url": version_info["download_url"],
+            "source_url": download_url,
+            "etag": result.etag,
+            "last_modified": result.last_modified,
             "file_size": OUTPUT_FILE.stat().st_size,
             "row_count": row_count,
             "fields": self._get_csv_fields(OUTPUT_FILE),
@@ -671,74 +787,9 @@ class OfficialDataDownloader:
         if temp_file.exists():
             temp_file.unlink()
 
-        # 清理解壓的 CSV 檔案和解壓目錄
-        for csv_file in csv_files:
-            if csv_file != temp_file and csv_file.exists():
-                csv_file.unlink()
-
-        # 清理解壓目錄
-        extract_dir = self.data_dir / "temp_extract"
-        if extract_dir.exists():
-            shutil.rmtree(extract_dir)
-
         logger.info(f"✅ 資料更新成功 | version={new_version} | rows={row_count}")
         return True
 
-    async def _extract_zip(self, zip_path: Path) -> Optional[List[Path]]:
-        """
-        解壓縮 ZIP 檔案並找到所有 CSV 檔案。
-
-        Args:
-            zip_path: ZIP 檔案路徑
-
-        Returns:
-            CSV 檔案路徑列表，失敗時返回 None
-        """
-        try:
-            extract_dir = self.data_dir / "temp_extract"
-            # 清空舊的解壓目錄
-            if extract_dir.exists():
-                shutil.rmtree(extract_dir)
-            extract_dir.mkdir(exist_ok=True)
-
-            logger.info(f"解壓縮 ZIP | path={zip_path}")
-
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                # 列出所有檔案
-                file_list = zip_ref.namelist()
-                logger.info(f"ZIP 包含 {len(file_list)} 個檔案")
-
-                # 尋找 CSV 檔案（通常是不動產買賣的）
-                csv_files = [f for f in file_list if f.endswith(".csv") and "lvr_land" in f.lower()]
-
-                if not csv_files:
-                    # 如果沒有找到特定的，尋找任何 CSV
-                    csv_files = [f for f in file_list if f.endswith(".csv")]
-
-                if not csv_files:
-                    logger.error("ZIP 中沒有找到 CSV 檔案")
-                    return None
-
-                logger.info(f"找到 {len(csv_files)} 個 CSV 檔案")
-
-                # 解壓縮所有 CSV 檔案
-                extracted_paths = []
-                for csv_file_name in csv_files:
-                    zip_ref.extract(csv_file_name, extract_dir)
-                    csv_file = extract_dir / csv_file_name
-                    extracted_paths.append(csv_file)
-
-                logger.info(f"解壓縮成功 | 檔案數={len(extracted_paths)}")
-
-                return extracted_paths
-
-        except zipfile.BadZipFile:
-            logger.error("無效的 ZIP 檔案")
-            return None
-        except Exception as e:
-            logger.error(f"解壓縮失敗 | error={e}", exc_info=True)
-            return None
-
     def _get_csv_fields(self, file_path: Path) -> List[str]:
         """取得 CSV 欄位名稱."""
         try:
@@ -788,6 +839,16 @@ async def force_update() -> bool:
     return await _downloader.download_and_process()
 
 
+async def shutdown() -> None:
+    """關閉全域下載器的 HTTP 連線（應用程式結束時呼叫）."""
+    await _downloader.close()
+
+
+def get_last_download_epoch() -> Optional[float]:
+    """取得上次下載時間（epoch 秒數，便捷函式）."""
+    return _downloader.version_info.get_last_download_epoch()
+
+
 def get_version_info() -> Dict:
     """取得版本資訊（便捷函式）."""
     return _downloader.version_info._data
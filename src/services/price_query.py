@@ -3,15 +3,23 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 from dataclasses import dataclass
+from functools import lru_cache
+from math import fsum
+from operator import itemgetter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
-import hashlib
+
+from ..utils.ttl_cache import TTLCache
 
 
 logger = logging.getLogger(__name__)
 
+# 房價查詢結果快取的地區數上限
+_PRICE_CACHE_MAXSIZE = 512
+
 
 # ==================== 數據類定義 ====================
 
@@ -64,35 +72,27 @@ class PriceStatistics:
 # ==================== 快取機制 ====================
 
 class PriceCache:
-    """房價查詢快取."""
+    """房價查詢快取（依正規化後的地區字串，逾時或超過筆數上限即淘汰）."""
 
-    def __init__(self, ttl_hours: int = 24):
-        self._cache: Dict[str, Tuple[PriceStatistics, datetime]] = {}
-        self._ttl = timedelta(hours=ttl_hours)
+    def __init__(self, ttl_hours: int = 24, maxsize: int = _PRICE_CACHE_MAXSIZE):
+        self._cache: TTLCache[str, PriceStatistics] = TTLCache(maxsize=maxsize, ttl=ttl_hours * 3600)
 
-    def _make_key(self, area: str) -> str:
+    @staticmethod
+    def _make_key(area: str) -> str:
         """生成快取鍵."""
-        normalized = area.strip().lower()
-        return hashlib.md5(normalized.encode()).hexdigest()
+        return area.strip().lower()
 
     def get(self, area: str) -> Optional[PriceStatistics]:
         """獲取快取數據."""
-        key = self._make_key(area)
-        if key in self._cache:
-            stats, timestamp = self._cache[key]
-            if datetime.now() - timestamp < self._ttl:
-                logger.info(f"快取命中 | area={area}")
-                return stats
-            else:
-                logger.info(f"快取過期 | area={area}")
-                del self._cache[key]
-        return None
+        stats = self._cache.get(self._make_key(area))
+        if stats is not None:
+            logger.info("快取命中 | area=%s", area)
+        return stats
 
     def set(self, area: str, stats: PriceStatistics) -> None:
         """設置快取數據."""
-        key = self._make_key(area)
-        self._cache[key] = (stats, datetime.now())
-        logger.info(f"快取已更新 | area={area}")
+        self._cache[self._make_key(area)] = stats
+        logger.info("快取已更新 | area=%s", area)
 
     def clear(self) -> None:
         """清空快取."""
@@ -338,8 +338,9 @@ async def load_csv_data(csv_path: str = "data/taichung_prices.csv", auto_downloa
 
         logger.info(f"CSV 中的地區清單：{', '.join(sorted(districts))}")
 
-        # 儲存到快取
+        # 儲存到快取；資料重新載入後，先前的統計結果一併作廢
         _csv_cache.set(data)
+        _price_cache.clear()
 
         return data
 
@@ -558,6 +559,14 @@ def get_available_districts(data: List[Dict[str, str]]) -> List[str]:
     return sorted(districts)
 
 
+# 地址解析用的正規表示式；同一批成交資料常重複出現相同地址，解析結果一併快取
+_ADDRESS_PREFIX_RE = re.compile("臺中市|台中市|北屯區|西屯區|南屯區|中區|東區|西區|南區|北區")
+_HOUSE_NUMBER_RE = re.compile(r"(\d+)(?:號|之|樓|-)?")
+_WHITESPACE_RE = re.compile(r"\s+")
+_ROAD_NAME_RE = re.compile(r"([^區]+?(?:路|街|巷|弄|段))")
+
+
+@lru_cache(maxsize=65536)
 def parse_address(address: str) -> Tuple[Optional[str], Optional[int]]:
     """
     解析地址，提取路段名稱和門牌號碼。
@@ -574,33 +583,23 @@ def parse_address(address: str) -> Tuple[Optional[str], Optional[int]]:
         "臺中市西屯區市政路500號" -> ("市政路", 500)
         "臺中市北屯區昌平路1段50號" -> ("昌平路1段", 50)
     """
-    import re
-
     if not address:
         return None, None
 
     # 移除縣市、行政區前綴
-    address = address.replace("臺中市", "").replace("台中市", "").strip()
-
-    # 移除常見的行政區名稱
-    for district in ["北屯區", "西屯區", "南屯區", "中區", "東區", "西區", "南區", "北區"]:
-        address = address.replace(district, "")
-
-    address = address.strip()
+    address = _ADDRESS_PREFIX_RE.sub("", address).strip()
 
     # 提取門牌號碼（數字 + 號/之/樓等）
-    number_match = re.search(r'(\d+)(?:號|之|樓|-)?', address)
+    number_match = _HOUSE_NUMBER_RE.search(address)
     number = int(number_match.group(1)) if number_match else None
 
     # 提取路段名稱（在門牌號碼之前的部分）
     if number_match:
-        # 取號碼之前的文字作為路段名稱
-        road_name = address[:number_match.start()].strip()
-        # 清理路段名稱（移除多餘空白）
-        road_name = re.sub(r'\s+', '', road_name)
+        # 取號碼之前的文字作為路段名稱，並移除多餘空白
+        road_name = _WHITESPACE_RE.sub("", address[:number_match.start()])
     else:
         # 如果沒有門牌號碼，嘗試提取路名
-        road_match = re.search(r'([^區]+?(?:路|街|巷|弄|段))', address)
+        road_match = _ROAD_NAME_RE.search(address)
         road_name = road_match.group(1) if road_match else None
 
     return road_name, number
@@ -622,80 +621,56 @@ def group_by_project(transactions: List[Transaction], proximity_threshold: int =
     Returns:
         建案分組列表（已排序：路段名稱 A-Z，門牌號碼由小到大）
     """
-    # 解析每筆交易的地址
-    parsed_transactions = []
+    # 按路段分組：(門牌號碼, 交易)，無門牌號碼的設為 0；只處理有路段名稱的交易
+    road_groups: Dict[str, List[Tuple[int, Transaction]]] = defaultdict(list)
     for t in transactions:
         road_name, number = parse_address(t.road)
-        if road_name:  # 只處理有路段名稱的交易
-            parsed_transactions.append({
-                "transaction": t,
-                "road_name": road_name,
-                "number": number or 0,  # 無門牌號碼的設為 0
-            })
-
-    # 按路段分組
-    road_groups = defaultdict(list)
-    for item in parsed_transactions:
-        road_groups[item["road_name"]].append(item)
-
-    # 對每個路段內的交易按門牌號碼排序
-    for road_name in road_groups:
-        road_groups[road_name].sort(key=lambda x: x["number"])
-
-    # 智能分組：同路段內，門牌相近的合併
+        if road_name:
+            road_groups[road_name].append((number or 0, t))
+
+    # 智能分組：同路段內依門牌排序，門牌相近的合併
     project_groups = []
 
-    for road_name in sorted(road_groups.keys()):  # 按路段名稱排序
+    for road_name in sorted(road_groups):  # 按路段名稱排序
         items = road_groups[road_name]
+        items.sort(key=itemgetter(0))
 
-        if not items:
-            continue
-
-        # 初始化第一組
-        current_group = [items[0]]
-
+        start = 0
         for i in range(1, len(items)):
-            prev_number = items[i - 1]["number"]
-            curr_number = items[i]["number"]
-
-            # 判斷是否應該併入同一組
-            if abs(curr_number - prev_number) <= proximity_threshold:
-                current_group.append(items[i])
-            else:
-                # 門牌差距大，創建新組
-                project_groups.append(_create_project_group(road_name, current_group))
-                current_group = [items[i]]
+            # 門牌差距大，前面累積的自成一組
+            if items[i][0] - items[i - 1][0] > proximity_threshold:
+                project_groups.append(_create_project_group(road_name, items[start:i]))
+                start = i
 
         # 處理最後一組
-        if current_group:
-            project_groups.append(_create_project_group(road_name, current_group))
+        project_groups.append(_create_project_group(road_name, items[start:]))
 
     return project_groups
 
 
-def _create_project_group(road_name: str, items: List[Dict]) -> ProjectGroup:
+def _create_project_group(road_name: str, items: List[Tuple[int, Transaction]]) -> ProjectGroup:
     """
     創建建案分組物件。
 
     Args:
         road_name: 路段名稱
-        items: 該組的交易項目列表
+        items: 該組的 (門牌號碼, 交易) 列表，已依門牌排序
 
     Returns:
         ProjectGroup 物件
     """
-    transactions = [item["transaction"] for item in items]
-    numbers = [item["number"] for item in items if item["number"] > 0]
+    transactions = [t for _, t in items]
+    numbers = [number for number, _ in items if number > 0]
 
     # 計算統計資訊
     transaction_count = len(transactions)
-    avg_price = sum(t.price for t in transactions) / transaction_count
-    avg_unit_price = sum(t.unit_price for t in transactions) / transaction_count
+    avg_price = fsum(t.price for t in transactions) / transaction_count
+    avg_unit_price = fsum(t.unit_price for t in transactions) / transaction_count
 
-    # 生成門牌範圍
+    # 生成門牌範圍（items 已排序，頭尾即最小、最大門牌）
     if numbers:
-        min_number = min(numbers)
-        max_number = max(numbers)
+        min_number = numbers[0]
+        max_number = numbers[-1]
         if min_number == max_number:
             address_range = f"{min_number}號"
         else:
@@ -706,12 +681,7 @@ def _create_project_group(road_name: str, items: List[Dict]) -> ProjectGroup:
         address_range = "未知門牌"
 
     # 生成成交門牌列表
-    addresses = []
-    for item in items:
-        if item["number"] > 0:
-            addresses.append(f"#{item['number']}")
-        else:
-            addresses.append("#未知")
+    addresses = [f"#{number}" if number > 0 else "#未知" for number, _ in items]
 
     return ProjectGroup(
         road_name=road_name,
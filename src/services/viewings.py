@@ -8,12 +8,12 @@ from typing import List, Optional
 from .. import database
 
 
-@dataclass
+@dataclass(slots=True)
 class Viewing:
     id: int
     guild_id: int
     creator_id: int
-    scheduled_at: str
+    scheduled_at: int  # Unix epoch 秒數
     client: str
     property: str
     agent: Optional[str]
@@ -24,6 +24,12 @@ class Viewing:
     created_at: str
 
 
+# 欄位順序與 dataclass 一致，查詢結果可直接依位置建立物件
+_VIEWING_COLUMNS = (
+    "id, guild_id, creator_id, scheduled_at, client, property, agent, contact, note, link, reminded, created_at"
+)
+
+
 async def add_viewing(
     *,
     guild_id: int,
@@ -45,7 +51,7 @@ async def add_viewing(
             (
                 guild_id,
                 creator_id,
-                scheduled_at.isoformat(),
+                int(scheduled_at.timestamp()),
                 client,
                 property,
                 agent,
@@ -64,36 +70,39 @@ async def list_viewings(
     creator_id: int,
     until: Optional[datetime] = None,
 ) -> List[Viewing]:
-    query = "SELECT * FROM viewings WHERE guild_id = ? AND creator_id = ?"
+    query = f"SELECT {_VIEWING_COLUMNS} FROM viewings WHERE guild_id = ? AND creator_id = ?"
     params: List[object] = [guild_id, creator_id]
     if until:
         query += " AND scheduled_at <= ?"
-        params.append(until.isoformat())
+        params.append(int(until.timestamp()))
     query += " ORDER BY scheduled_at"
 
     async with database.connect() as db:
         cursor = await db.execute(query, params)
         rows = await cursor.fetchall()
-        return [Viewing(**dict(row)) for row in rows]
+        return [Viewing(*row) for row in rows]
 
 
 async def pending_reminders(*, before: datetime) -> List[Viewing]:
     async with database.connect() as db:
         cursor = await db.execute(
-            """
-            SELECT * FROM viewings
+            f"""
+            SELECT {_VIEWING_COLUMNS} FROM viewings
             WHERE reminded = 0 AND scheduled_at <= ?
             """,
-            (before.isoformat(),),
+            (int(before.timestamp()),),
         )
         rows = await cursor.fetchall()
-        return [Viewing(**dict(row)) for row in rows]
+        return [Viewing(*row) for row in rows]
 
 
-async def mark_reminded(viewing_id: int) -> None:
+async def mark_reminded_many(viewing_ids: List[int]) -> None:
+    if not viewing_ids:
+        return
+    placeholders = ", ".join("?" * len(viewing_ids))
     async with database.connect() as db:
         await db.execute(
-            "UPDATE viewings SET reminded = 1 WHERE id = ?",
-            (viewing_id,),
+            f"UPDATE viewings SET reminded = 1 WHERE id IN ({placeholders})",
+            viewing_ids,
         )
         await db.commit()
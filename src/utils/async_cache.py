@@ -0,0 +1,49 @@
+"""In-process TTL cache for coroutine results."""
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_entries: Dict[Hashable, Tuple[float, "asyncio.Future"]] = {}
+
+
+def _evict_failed(key: Hashable, task: "asyncio.Future") -> None:
+    if not task.cancelled() and task.exception() is None:
+        return
+    entry = _entries.get(key)
+    if entry is not None and entry[1] is task:
+        del _entries[key]
+
+
+def _purge_expired(now: float) -> None:
+    expired = [key for key, (expires_at, task) in _entries.items() if task.done() and expires_at <= now]
+    for key in expired:
+        del _entries[key]
+
+
+async def cached(key: Hashable, ttl: float, coro_factory: Callable[[], Awaitable[T]]) -> T:
+    """Return the result cached under ``key`` or await ``coro_factory()`` to fill it.
+
+    Concurrent callers for the same key share a single in-flight call. Failed
+    calls are evicted immediately so the next caller retries.
+    """
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry is not None:
+        expires_at, task = entry
+        if not task.done() or now < expires_at:
+            return await asyncio.shield(task)
+
+    _purge_expired(now)
+    task = asyncio.ensure_future(coro_factory())
+    task.add_done_callback(functools.partial(_evict_failed, key))
+    _entries[key] = (now + ttl, task)
+    return await asyncio.shield(task)
+
+
+def clear() -> None:
+    _entries.clear()
@@ -1,12 +1,14 @@
 """Utility helpers for parsing and formatting command inputs."""
 from __future__ import annotations
 
-from datetime import datetime
+import re
+from datetime import date, datetime
+from functools import lru_cache
 from typing import Optional, Tuple
 
-from dateutil import parser
-
 
+# 指令常重複輸入相同的範圍字串，以下皆為純函式，可直接快取結果
+@lru_cache(maxsize=2048)
 def parse_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
     if not value:
         return None, None
@@ -25,6 +27,7 @@ def parse_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
     return start_num, end_num
 
 
+@lru_cache(maxsize=2048)
 def parse_float_range(value: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
     if not value:
         return None, None
@@ -43,8 +46,38 @@ def parse_float_range(value: Optional[str]) -> Tuple[Optional[float], Optional[f
     return start_num, end_num
 
 
+@lru_cache(maxsize=1024)
+def parse_price(value: Optional[str]) -> Optional[int]:
+    """解析「3000」或「3000萬」形式的價格（單位：萬），格式錯誤時回傳 None。"""
+    if not value:
+        return None
+    try:
+        return int(value.strip().rstrip("萬"))
+    except ValueError:
+        return None
+
+
+_AREA_SEPARATORS = re.compile(r"[,，、/\s]+")
+
+
+def split_areas(value: Optional[str]) -> Tuple[str, ...]:
+    """將「北屯,西屯、南屯」形式的偏好區域拆成不重複的區域名稱，保留輸入順序。"""
+    if not value:
+        return ()
+    return tuple(dict.fromkeys(area for area in _AREA_SEPARATORS.split(value) if area))
+
+
 def parse_datetime(value: str) -> Optional[datetime]:
+    # 正規化空白以提高命中率；缺少的日期欄位以今天補齊，因此快取鍵需包含日期
+    return _parse_datetime(" ".join(value.split()), date.today())
+
+
+@lru_cache(maxsize=1024)
+def _parse_datetime(value: str, today: date) -> Optional[datetime]:
+    # dateutil 是此模組最重的相依套件，只在第一次解析日期時載入
+    from dateutil import parser
+
     try:
-        return parser.parse(value)
+        return parser.parse(value, default=datetime(today.year, today.month, today.day))
     except (ValueError, parser.ParserError):
         return None
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from src import database
+
+
+@pytest.fixture
+def run_db(tmp_path, monkeypatch):
+    """以暫存資料庫執行協程；結束時關閉共用連線，避免背景執行緒讓程序卡住。"""
+    monkeypatch.setattr(database, "_DB_PATH", tmp_path / "vicbot.db")
+    monkeypatch.setattr(database, "_connection", None)
+    monkeypatch.setattr(database, "_lock", None)
+
+    def run(coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                await database.close_db()
+
+        return asyncio.run(wrapper())
+
+    return run
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from src.utils import async_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    async_cache.clear()
+    yield
+    async_cache.clear()
+
+
+class Counter:
+    def __init__(self, *, delay=0.0, fail=None):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return self.calls
+
+
+def test_concurrent_callers_share_one_call():
+    fetch = Counter(delay=0.01)
+
+    async def scenario():
+        return await asyncio.gather(*(async_cache.cached("k", 60, fetch) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [1] * 5
+    assert fetch.calls == 1
+
+
+@pytest.mark.parametrize("error", [RuntimeError("boom"), asyncio.CancelledError()])
+def test_failed_or_cancelled_call_is_evicted(error):
+    failing = Counter(fail=error)
+    fetch = Counter()
+
+    async def scenario():
+        with pytest.raises(type(error)):
+            await async_cache.cached("k", 60, failing)
+        await asyncio.sleep(0)  # 讓 done callback 執行
+        return await async_cache.cached("k", 60, fetch)
+
+    assert asyncio.run(scenario()) == 1
+    assert failing.calls == 1
+    assert fetch.calls == 1
+
+
+def test_expired_entry_is_refetched():
+    fetch = Counter()
+
+    async def scenario():
+        first = await async_cache.cached("k", 0, fetch)
+        second = await async_cache.cached("k", 0, fetch)
+        cached = await async_cache.cached("other", 60, fetch)
+        return first, second, cached, await async_cache.cached("other", 60, fetch)
+
+    assert asyncio.run(scenario()) == (1, 2, 3, 3)
+    assert fetch.calls == 3
+
+
+def test_cancelled_waiter_does_not_cancel_shared_task():
+    fetch = Counter(delay=0.05)
+
+    async def scenario():
+        waiter = asyncio.create_task(async_cache.cached("k", 60, fetch))
+        other = asyncio.create_task(async_cache.cached("k", 60, fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await other, await async_cache.cached("k", 60, fetch)
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert fetch.calls == 1
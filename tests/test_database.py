@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from src import database
+
+_LEGACY_ROWS = {
+    1: "2026-10-20T14:00:00",  # 無時區 → 視為 Asia/Taipei
+    2: "2026-10-20T14:00:00+00:00",  # 有時區 → 保留原時區
+    3: "下週二下午",  # 無法解析 → 保留原值
+}
+
+
+async def _insert_legacy_viewings():
+    async with database.connect() as db:
+        await db.executemany(
+            "INSERT INTO viewings (id, guild_id, creator_id, scheduled_at, client, property) "
+            "VALUES (?, 1, 1, ?, 'c', 'p')",
+            list(_LEGACY_ROWS.items()),
+        )
+        await db.commit()
+
+
+async def _scheduled_values():
+    async with database.connect() as db:
+        cursor = await db.execute("SELECT id, scheduled_at FROM viewings ORDER BY id")
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+def test_migrate_viewings_to_epoch(run_db, caplog):
+    caplog.set_level(logging.INFO, logger=database.__name__)
+
+    async def scenario():
+        await database.init_db("Asia/Taipei")
+        await _insert_legacy_viewings()
+        await database.init_db("Asia/Taipei")
+        first = await _scheduled_values()
+
+        caplog.clear()
+        await database.init_db("Asia/Taipei")
+        return first, await _scheduled_values()
+
+    first, second = run_db(scenario())
+
+    assert first[1] == int(datetime(2026, 10, 20, 14, tzinfo=ZoneInfo("Asia/Taipei")).timestamp())
+    assert first[2] == int(datetime.fromisoformat(_LEGACY_ROWS[2]).timestamp())
+    assert first[1] - first[2] == -8 * 3600
+    assert first[3] == _LEGACY_ROWS[3]
+
+    # 第二次啟動不再改寫任何資料，但無法轉換的列仍會警告
+    assert second == first
+    messages = [record.getMessage() for record in caplog.records]
+    assert not any("已轉換" in message for message in messages)
+    assert any("無法轉換看屋時間" in message and "viewing_id=3" in message for message in messages)
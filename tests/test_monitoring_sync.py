@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import discord
+
+import bot
+from src import database
+from src.config import BotConfig
+from src.services import monitoring
+
+
+class _Crash(Exception):
+    """模擬推播中途程序中斷。"""
+
+
+def _make_bot(monkeypatch, send):
+    monkeypatch.setattr(bot, "_fetch_listings_cached", _fake_listings)
+    monkeypatch.setattr(bot, "_build_listings_embed", lambda title, listings: discord.Embed(title=title))
+    instance = bot.VicBot(config=BotConfig(token="x", default_report_channel_id=None))
+
+    async def resolve_user(user_id, guild_id=None):
+        return SimpleNamespace(send=lambda **kwargs: send(user_id))
+
+    instance._resolve_user = resolve_user
+    return instance
+
+
+async def _fake_listings(session, **kwargs):
+    return [object()]
+
+
+async def _add_rules(n):
+    return [
+        await monitoring.add_rule(
+            user_id=user_id, guild_id=1, area="西屯區",
+            price_min=None, price_max=None, size_min=None, size_max=None,
+        )
+        for user_id in range(1, n + 1)
+    ]
+
+
+def test_rule_deleted_mid_sync_does_not_drop_progress(run_db, monkeypatch):
+    sent = []
+
+    async def scenario():
+        await database.init_db()
+        rule_ids = await _add_rules(3)
+
+        async def send(user_id):
+            sent.append(user_id)
+            if user_id == 2:
+                # 推播期間使用者執行 !監控刪除
+                await monitoring.delete_rule(rule_id=rule_ids[1], user_id=2, guild_id=1)
+
+        await _make_bot(monkeypatch, send)._do_moi_sync()
+        assert sent == [1, 2, 3]
+        iso = bot.datetime.now(bot.ZoneInfo("Asia/Taipei")).isocalendar()
+        assert await monitoring.synced_this_week(f"{iso.year}-W{iso.week:02d}") == {rule_ids[0], rule_ids[2]}
+
+        # 重啟後補跑：本週已推播的使用者不會再收到
+        sent.clear()
+        await _make_bot(monkeypatch, send)._do_moi_sync()
+        assert sent == []
+
+    run_db(scenario())
+
+
+def test_restart_after_crash_only_sends_remaining(run_db, monkeypatch):
+    sent = []
+
+    async def scenario():
+        await database.init_db()
+        await _add_rules(3)
+
+        async def crash_on_second(user_id):
+            if user_id == 2:
+                raise _Crash
+            sent.append(user_id)
+
+        await _make_bot(monkeypatch, crash_on_second)._do_moi_sync()
+        assert sent == [1]
+
+        async def send(user_id):
+            sent.append(user_id)
+
+        sent.clear()
+        await _make_bot(monkeypatch, send)._do_moi_sync()
+        assert sent == [2, 3]
+
+    run_db(scenario())
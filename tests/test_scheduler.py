@@ -0,0 +1,126 @@
+import asyncio
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import bot
+from src.config import BotConfig
+
+TZ = ZoneInfo("Asia/Taipei")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """固定 bot 模組看到的現在時間；以 clock.now = ... 調整。"""
+
+    class FixedDatetime(datetime):
+        now_value = None
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.now_value.astimezone(tz) if tz else cls.now_value
+
+    monkeypatch.setattr(bot, "datetime", FixedDatetime)
+
+    class Clock:
+        @property
+        def now(self):
+            return FixedDatetime.now_value
+
+        @now.setter
+        def now(self, value):
+            FixedDatetime.now_value = value
+
+    return Clock()
+
+
+@pytest.fixture
+def vicbot():
+    return bot.VicBot(config=BotConfig(token="x", default_report_channel_id=None))
+
+
+def _local(*args):
+    return datetime(*args, tzinfo=TZ)
+
+
+def test_catch_up_runs_immediately_after_this_weeks_slot(clock, vicbot):
+    # 2026-10-12 是週一
+    clock.now = _local(2026, 10, 14, 15, 0)
+    assert vicbot._first_weekly(0, 9, catch_up=True) == clock.now.timestamp()
+    assert vicbot._first_weekly(0, 9) == _local(2026, 10, 19, 9, 0).timestamp()
+
+
+def test_catch_up_waits_when_slot_not_reached_this_week(clock, vicbot):
+    clock.now = _local(2026, 10, 12, 8, 59)
+    assert vicbot._first_weekly(0, 9, catch_up=True) == _local(2026, 10, 12, 9, 0).timestamp()
+
+
+def test_catch_up_on_sunday_night_covers_the_same_iso_week(clock, vicbot):
+    clock.now = _local(2026, 10, 18, 23, 30)
+    assert vicbot._first_weekly(0, 9, catch_up=True) == clock.now.timestamp()
+
+
+@pytest.mark.parametrize(
+    "now, expected",
+    [
+        (_local(2026, 10, 12, 8, 59, 59), _local(2026, 10, 12, 9, 0)),
+        (_local(2026, 10, 12, 9, 0), _local(2026, 10, 19, 9, 0)),
+        (_local(2026, 10, 12, 9, 0, 1), _local(2026, 10, 19, 9, 0)),
+        (_local(2026, 10, 18, 23, 59), _local(2026, 10, 19, 9, 0)),
+    ],
+)
+def test_next_weekly_monday_boundary(now, expected):
+    assert bot._next_weekly(now, 0, 9) == expected
+
+
+def test_weekly_next_after_uses_previous_slot(clock, vicbot):
+    next_after = vicbot._weekly(0, 9)
+    slot = _local(2026, 10, 12, 9, 0)
+
+    # 準時或稍晚醒來：排到下週同一時段
+    clock.now = _local(2026, 10, 12, 9, 0, 0, 500000)
+    assert next_after(slot.timestamp()) == _local(2026, 10, 19, 9, 0).timestamp()
+
+    # 任務執行跨過多週（例如長時間停機）：從現在往後找，不補發錯過的每一週
+    clock.now = _local(2026, 10, 27, 12, 0)
+    assert next_after(slot.timestamp()) == _local(2026, 11, 2, 9, 0).timestamp()
+
+
+def test_sunday_night_start_schedules_monday(clock, vicbot):
+    clock.now = _local(2026, 10, 18, 22, 0)
+    assert vicbot._first_weekly(0, 10) == _local(2026, 10, 19, 10, 0).timestamp()
+
+
+def test_job_is_requeued_only_after_it_finishes(vicbot):
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def job():
+            calls.append(time.time())
+            await release.wait()
+
+        async def ready():
+            return None
+
+        vicbot.wait_until_ready = ready
+        # next_after 回傳過去的時間：若執行中就排入下一次，會立刻重疊觸發
+        vicbot._add_job("job", job, time.time() - 1, lambda prev: time.time() - 1)
+        scheduler = asyncio.create_task(vicbot._scheduler())
+        try:
+            await asyncio.sleep(0.05)
+            assert len(calls) == 1
+            assert vicbot._schedule == []
+
+            release.set()
+            await asyncio.sleep(0.05)
+            assert len(calls) >= 2
+        finally:
+            scheduler.cancel()
+            for task in list(vicbot._running_jobs):
+                task.cancel()
+
+    asyncio.run(scenario())
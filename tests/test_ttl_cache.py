@@ -0,0 +1,60 @@
+import pytest
+
+from src.utils import ttl_cache
+from src.utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_expires_on_read(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache["a"] = 1
+    clock[0] += 9.9
+    assert cache.get("a") == 1
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_rewrite_refreshes_ttl(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache["a"] = 1
+    clock[0] += 5
+    cache["a"] = 2
+    clock[0] += 9
+    assert cache.get("a") == 2
+
+
+def test_maxsize_evicts_least_recently_written(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"] = 3  # 重新寫入後 a 變成最新
+    cache["c"] = 4
+    assert cache.get("b") is None
+    assert cache.get("a") == 3
+    assert cache.get("c") == 4
+    assert len(cache) == 2
+
+
+def test_write_drops_expired_entries(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache["a"] = 1
+    clock[0] += 11
+    cache["b"] = 2
+    assert len(cache) == 1
+
+
+def test_clear(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("a") is None
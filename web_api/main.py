@@ -27,7 +27,7 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 VicBot Web API 啟動中...")
 
     # 初始化資料庫
-    await database.init_db()
+    await database.init_db(os.getenv("TIMEZONE", "Asia/Taipei"))
     await init_users_table()
 
     logger.info("✅ 資料庫初始化完成")
@@ -35,6 +35,7 @@ async def lifespan(app: FastAPI):
     yield
 
     # 關閉時執行
+    await database.close_db()
     logger.info("👋 VicBot Web API 關閉")
 
 
@@ -71,14 +71,13 @@ async def get_client(
 
     只能查看自己的客戶。
     """
-    # 透過 list_clients 取得，自動檢查權限
-    client_list = await clients.list_clients(
+    # 以 owner_id 一併過濾，只取單筆並自動檢查權限
+    client = await clients.get_client(
+        client_id=client_id,
         guild_id=current_user["guild_id"],
         owner_id=current_user["discord_id"]
     )
 
-    client = next((c for c in client_list if c.id == client_id), None)
-
     if not client:
         raise HTTPException(status_code=404, detail="找不到該客戶或無權限查看")
 
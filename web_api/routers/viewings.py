@@ -1,6 +1,8 @@
 """Viewings endpoints for Web API."""
+import os
 from typing import List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Depends, Query
 from web_api.models.schemas import Viewing, ViewingCreate, MessageResponse
 from web_api.auth.jwt_handler import get_current_user
@@ -8,6 +10,9 @@ from src.services import viewings
 
 router = APIRouter(prefix="/viewings", tags=["看屋"])
 
+# 未帶時區的時間視為此時區的當地時間（與 Bot 及資料庫遷移相同），而非伺服器所在時區
+_LOCAL_TZ = ZoneInfo(os.getenv("TIMEZONE", "Asia/Taipei"))
+
 
 @router.post("", response_model=MessageResponse, summary="新增看屋排程")
 async def create_viewing(
@@ -19,10 +24,14 @@ async def create_viewing(
 
     創建新的看屋行程，系統會在預定時間前 90 分鐘發送提醒。
     """
+    scheduled_at = viewing.scheduled_at
+    if scheduled_at.tzinfo is None:
+        scheduled_at = scheduled_at.replace(tzinfo=_LOCAL_TZ)
+
     viewing_id = await viewings.add_viewing(
         guild_id=current_user["guild_id"],
         creator_id=current_user["discord_id"],
-        scheduled_at=viewing.scheduled_at,
+        scheduled_at=scheduled_at,
         client=viewing.client,
         property=viewing.property,
         agent=viewing.agent,
@@ -47,7 +56,7 @@ async def get_viewings(
 
     預設顯示未來 7 天的看屋行程。
     """
-    until = datetime.utcnow() + timedelta(days=days)
+    until = datetime.now(timezone.utc) + timedelta(days=days)
 
     viewing_list = await viewings.list_viewings(
         guild_id=current_user["guild_id"],
@@ -60,7 +69,7 @@ async def get_viewings(
             id=v.id,
             guild_id=v.guild_id,
             creator_id=v.creator_id,
-            scheduled_at=datetime.fromisoformat(v.scheduled_at),
+            scheduled_at=datetime.fromtimestamp(v.scheduled_at, tz=timezone.utc),
             client=v.client,
             property=v.property,
             agent=v.agent,